@@ -0,0 +1,230 @@
+"""
+Engine benchmarks at increasing trade counts.
+
+    python -m benchmarks.bench_engines --sizes 10k,100k,1M,10M --repeat 3 --json bench.json
+
+Builds each dataset with PRISMDataGenerator (vectorized), times every engine entry point
+and samples the process RSS while it runs, then prints throughput / peak-RSS tables and
+the scaling exponent per benchmark (slope of log time vs log trades; 1.0 is linear).
+"""
+import argparse
+import gc
+import json
+import math
+import sys
+import threading
+import time
+
+import numpy as np
+
+from src.dashboard.reporter import PRISMReporter
+from src.data.data_generator import PRISMDataGenerator
+from src.engine.behavior_engine import PRISMBehaviorEngine
+from src.engine.metrics import current_rss, max_rss
+from src.engine.correlation_engine import PRISMCorrelationEngine
+from src.engine.network_mapper import PRISMNetworkMapper
+from src.engine.pipeline import PRISMAnalysisPipeline
+from src.engine.regime_monitor import PRISMRegimeMonitor
+from src.engine.synthesizer import PRISMEvidenceSynthesizer
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+DEFAULT_SIZES = ("10k", "100k", "1M")
+# Vectorized generation averages about this many trades per client (regular + fraud)
+TRADES_PER_CLIENT = 14
+ATTRIBUTION_GROUPS = 1000
+
+def parse_size(label):
+    """'10k' / '1M' / '2500' -> trade count."""
+    if label in SIZES:
+        return SIZES[label]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(label[-1].lower(), 1)
+    return int(float(label.rstrip("kKmM")) * multiplier)
+
+
+def build_dataset(n_trades, seed=42):
+    """(partners, subs, clients, trades) with roughly n_trades trades and every fraud pattern present."""
+    n_clients = max(40, math.ceil(n_trades / TRADES_PER_CLIENT))
+    num_partners = max(4, n_clients // 2000)
+    subs_per_partner = 5
+    clients_per_sub = math.ceil(n_clients / (num_partners * subs_per_partner))
+    generator = PRISMDataGenerator(seed=seed)
+    partners, subs, clients = generator.generate_hierarchy(num_partners, subs_per_partner, clients_per_sub, vectorized=True)
+    sleeper = [{'partner_id': partners['partner_id'].iloc[-1], 'start_day': 25, 'volume_mult': 5.0}]
+    trades = generator.generate_trades(clients, subs, mirror_fraud_groups=max(2, n_clients // 5000),
+                                       regime_shift_config=sleeper, vectorized=True)
+    return partners, subs, clients, trades
+
+
+class PeakRSS:
+    """Samples RSS on a background thread while the block runs; peak and delta in bytes."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.baseline = self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.baseline = current_rss()
+        if self.baseline is None:
+            # Nothing to sample: fall back to the process high-water mark (None if unavailable too)
+            self.baseline = self.peak = max_rss()
+            return self
+        self.peak = self.baseline
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if hasattr(self, "_thread"):
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, current_rss())
+        else:
+            self.peak = max_rss()
+
+    @property
+    def delta(self):
+        return None if self.peak is None else self.peak - self.baseline
+
+
+def measure(fn, repeat=1):
+    """
+    Best wall time over repeat runs, with the highest sampled RSS (None where the platform
+    cannot report it). Returns (result, stats).
+    """
+    best, peak, delta, result = float("inf"), None, None, None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        with PeakRSS() as rss:
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        if rss.peak is not None:
+            peak, delta = max(peak or 0, rss.peak), max(delta or 0, rss.delta)
+    return result, {"seconds": best,
+                    "peak_rss_mb": None if peak is None else peak / 2**20,
+                    "rss_delta_mb": None if delta is None else delta / 2**20}
+
+
+def _benchmarks(partners, subs, clients, trades):
+    """(name, fn, units, unit name) per engine entry point; later entries reuse earlier results."""
+    correlation = PRISMCorrelationEngine(time_window_seconds=1.0)
+    behavior = PRISMBehaviorEngine()
+    regime = PRISMRegimeMonitor()
+    synthesizer = PRISMEvidenceSynthesizer()
+    reporter = PRISMReporter()
+    state = {}
+    rng = np.random.default_rng(0)
+    client_ids = clients['client_id'].to_numpy()
+    groups = [client_ids[rng.integers(0, len(client_ids), 5)].tolist() for _ in range(ATTRIBUTION_GROUPS)]
+
+    def mirror():
+        state['clusters'] = correlation.detect_mirror_trades(trades)
+        return state['clusters']
+
+    def rings():
+        state['rings'] = correlation.aggregate_rings(state['clusters'])
+        return state['rings']
+
+    def attribution():
+        # A fresh mapper, so the hierarchy index build is part of the cost
+        mapper = PRISMNetworkMapper(clients, subs, partners)
+        state['attribution'] = [mapper.get_attribution(r['client_ids']) for r in state['rings']]
+        return [mapper.get_attribution(group) for group in groups]
+
+    def reports():
+        return [
+            reporter.generate_html_report(r['id'], synthesizer.synthesize_ring(r, attr), attr)
+            for r, attr in zip(state['rings'], state['attribution'])
+        ]
+
+    n = len(trades)
+    return [
+        ("detect_mirror_trades", mirror, n, "trades"),
+        ("aggregate_rings", rings, n, "trades"),
+        ("detect_bonus_abuse", lambda: behavior.detect_bonus_abuse(trades, clients), n, "trades"),
+        ("detect_commission_inflation", lambda: behavior.detect_commission_inflation(trades, clients, subs), n, "trades"),
+        ("detect_regime_shifts", lambda: regime.detect_regime_shifts(trades, clients), n, "trades"),
+        ("mapper_attribution", attribution, ATTRIBUTION_GROUPS, "groups"),
+        ("report_generation", reports, None, "reports"),
+        ("analysis_pipeline", lambda: PRISMAnalysisPipeline(trades, clients, subs).run(), n, "trades"),
+    ]
+
+
+def run_suite(sizes=DEFAULT_SIZES, repeat=1, log=print):
+    """Runs every benchmark at every size; returns one row dict per (size, benchmark)."""
+    rows = []
+    for label in sizes:
+        partners, subs, clients, trades = build_dataset(parse_size(label))
+        log(f"[{label}] {len(trades):,} trades, {len(clients):,} clients")
+        for name, fn, units, unit_name in _benchmarks(partners, subs, clients, trades):
+            result, stats = measure(fn, repeat)
+            units = len(result) if units is None else units
+            rows.append({
+                "size": label, "trades": len(trades), "benchmark": name, "units": units, "unit": unit_name,
+                "throughput": units / stats['seconds'] if stats['seconds'] > 0 else float("inf"),
+                **stats
+            })
+        del partners, subs, clients, trades
+    return rows
+
+
+def scaling_exponents(rows):
+    """Per benchmark, the least-squares slope of log(seconds) against log(trades)."""
+    exponents = {}
+    for name in dict.fromkeys(r['benchmark'] for r in rows):
+        points = [(r['trades'], r['seconds']) for r in rows if r['benchmark'] == name and r['seconds'] > 0]
+        if len({n for n, _ in points}) >= 2:
+            x, y = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+            exponents[name] = float(np.polyfit(x, y, 1)[0])
+    return exponents
+
+
+def format_tables(rows):
+    """Markdown tables: throughput and peak RSS (benchmark x size), then scaling exponents."""
+    sizes = list(dict.fromkeys(r['size'] for r in rows))
+    names = list(dict.fromkeys(r['benchmark'] for r in rows))
+    cell = {(r['benchmark'], r['size']): r for r in rows}
+    trades = {r['size']: r['trades'] for r in rows}
+
+    def table(title, fmt):
+        lines = [f"### {title}", "", "| benchmark | " + " | ".join(f"{s} ({trades[s]:,} trades)" for s in sizes) + " |", "|---" * (len(sizes) + 1) + "|"]
+        for name in names:
+            lines.append(f"| {name} | " + " | ".join(fmt(cell[(name, s)]) if (name, s) in cell else "-" for s in sizes) + " |")
+        return "\n".join(lines)
+
+    exponents = scaling_exponents(rows)
+    parts = [
+        table("Throughput", lambda r: f"{r['throughput']:,.0f} {r['unit']}/s ({r['seconds']:.3f}s)"),
+        table("Peak RSS (MB, +delta)", lambda r: f"{r['peak_rss_mb']:,.0f} (+{r['rss_delta_mb']:,.0f})" if r['peak_rss_mb'] is not None else "n/a"),
+    ]
+    if exponents:
+        parts.append("### Scaling exponent (time ~ trades^k)\n\n| benchmark | k |\n|---|---|\n" +
+                     "\n".join(f"| {name} | {k:.2f} |" for name, k in exponents.items()))
+    return "\n\n".join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_engines", description="Benchmark every PRISM engine.")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help=f"Comma-separated trade counts (default: {','.join(DEFAULT_SIZES)}; e.g. 10k,100k,1M,10M)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per benchmark; the best time is kept")
+    parser.add_argument("--json", help="Also write the raw rows and exponents to this file")
+    args = parser.parse_args(argv)
+
+    rows = run_suite([s.strip() for s in args.sizes.split(",") if s.strip()], args.repeat)
+    print()
+    print(format_tables(rows))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": rows, "scaling_exponents": scaling_exponents(rows)}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Headless batch runner for scheduled surveillance jobs.
+
+    python -m src.cli data --output reports/nightly --start 2025-01-01 --end 2025-01-02 --workers 4
+
+Runs every engine over a dataset (Parquet store directory, CSV directory or database)
+and writes findings.json, one evidence JSON per ring, HTML briefs and the run's engine
+metrics (metrics.prom) to the output directory.
+Exit status: 0 no findings, 1 findings written, 2 error.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.dashboard.reporter import PRISMReporter
+from src.data.loader import PRISMDataLoader
+from src.data.storage import PRISMDataStore
+from src.engine.correlation_engine import PRISMCorrelationEngine
+from src.engine.metrics import default_metrics
+from src.engine.network_mapper import PRISMNetworkMapper
+from src.engine.pipeline import PRISMAnalysisPipeline
+from src.engine.regime_monitor import PRISMRegimeMonitor
+from src.engine.synthesizer import PRISMEvidenceSynthesizer
+
+EXIT_CLEAN = 0
+EXIT_FINDINGS = 1
+EXIT_ERROR = 2
+
+CSV_FILES = ("partners.csv", "subs.csv", "clients.csv", "trades.csv")
+
+
+def load_dataset(source, start=None, end=None):
+    """
+    Returns (partners, subs, clients, trades) from a PRISMDataStore directory, a directory
+    of the four CSVs, or a SQLAlchemy URL. Trades are limited to start <= entry_time < end.
+    """
+    if "://" in source:
+        partners, subs, clients, trades = PRISMDataLoader().load_from_db(source, since=start, since_inclusive=True)
+    elif PRISMDataStore(source).exists():
+        # Range filters are pushed down to the Parquet reader
+        return PRISMDataStore(source).read_all(start=start, end=end)
+    elif all(os.path.exists(os.path.join(source, name)) for name in CSV_FILES):
+        partners, subs, clients, trades = PRISMDataLoader().load_from_files(*(os.path.join(source, name) for name in CSV_FILES))
+    else:
+        raise FileNotFoundError(f"No PRISM dataset at {source} (expected Parquet tables, CSVs or a database URL)")
+
+    entry = pd.to_datetime(trades['entry_time'])
+    keep = np.ones(len(trades), dtype=bool)
+    if start is not None:
+        keep &= (entry >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        keep &= (entry < pd.Timestamp(end)).to_numpy()
+    return partners, subs, clients, trades[keep].reset_index(drop=True)
+
+
+def _json_default(value):
+    """JSON encoder fallback for NumPy scalars/arrays and timestamps in engine results."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, default=_json_default)
+
+
+def run_batch(partners, subs, clients, trades, output_dir, workers=1, time_window_seconds=1.0, log=print):
+    """
+    Runs the full engine set and writes the reports. Returns the findings summary.
+    workers: processes for partition-parallel mirror detection, and threads for the
+    independent detectors (which share one prepared frame) and the per-ring reports.
+    """
+    started = time.time()
+    pipeline = PRISMAnalysisPipeline(
+        trades, clients, subs,
+        correlation_engine=PRISMCorrelationEngine(time_window_seconds=time_window_seconds, n_workers=workers),
+        regime_monitor=PRISMRegimeMonitor()
+    )
+    pipeline.frame  # Prepared once, before the detectors fan out
+
+    # Detectors are independent given the frame; each memoizes its result on the pipeline
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(fn) for fn in (pipeline.rings, pipeline.bonus_abuse,
+                                                  pipeline.commission_inflation, pipeline.regime_alerts)]:
+            future.result()
+
+    mapper = PRISMNetworkMapper(clients, subs, partners)
+    snapshot = pipeline.snapshot(mapper, PRISMEvidenceSynthesizer())
+    log(f"Analyzed {len(trades):,} trades in {time.time() - started:.1f}s.")
+
+    evidence_dir = os.path.join(output_dir, "evidence")
+    briefs_dir = os.path.join(output_dir, "briefs")
+    os.makedirs(evidence_dir, exist_ok=True)
+    os.makedirs(briefs_dir, exist_ok=True)
+    reporter = PRISMReporter()
+
+    def write_ring(ring):
+        ring_id = ring['id']
+        evidence = snapshot['ring_evidence'][ring_id]
+        attribution = snapshot['ring_attribution'][ring_id]
+        _write_json(os.path.join(evidence_dir, f"{ring_id}.json"), {
+            "ring": ring, "attribution": attribution, "evidence": evidence
+        })
+        with open(os.path.join(briefs_dir, f"PRISM_Evidence_{ring_id}.html"), "w", encoding="utf-8") as f:
+            f.write(reporter.generate_html_report(ring_id, evidence, attribution))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(write_ring, snapshot['rings']))
+
+    findings = {
+        "generated_at": snapshot['created_at'],
+        "trade_count": snapshot['trade_count'],
+        "counts": {
+            "rings": len(snapshot['rings']),
+            "bonus_abuse": len(snapshot['bonus_abuse']),
+            "commission_inflation": len(snapshot['commission_inflation']),
+            "regime_alerts": len(snapshot['regime_alerts']),
+            "communities": len(snapshot['communities']['rings'])
+        },
+        "rings": [
+            {"id": r['id'], "client_ids": r['client_ids'], "clusters": len(r['clusters']),
+             "confidence": snapshot['ring_evidence'][r['id']]['confidence'],
+             "action": snapshot['ring_evidence'][r['id']]['agent_decision']['selected_action']}
+            for r in snapshot['rings']
+        ],
+        "bonus_abuse": [dict(a, evidence=e) for a, e in zip(snapshot['bonus_abuse'], snapshot['bonus_evidence'])],
+        "commission_inflation": [dict(f, evidence=e) for f, e in zip(snapshot['commission_inflation'], snapshot['commission_evidence'])],
+        "regime_alerts": snapshot['regime_alerts'],
+        "communities": snapshot['communities']['rings']
+    }
+    _write_json(os.path.join(output_dir, "findings.json"), findings)
+    # Engine timings for this run, e.g. for node_exporter's textfile collector
+    with open(os.path.join(output_dir, "metrics.prom"), "w", encoding="utf-8") as f:
+        f.write(default_metrics().to_prometheus())
+    return findings
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Run PRISM surveillance over a dataset without the dashboard.")
+    parser.add_argument("source", help="PRISMDataStore directory, directory of partners/subs/clients/trades CSVs, or a database URL")
+    parser.add_argument("-o", "--output", required=True, help="Directory for findings.json, evidence/, briefs/ and metrics.prom")
+    parser.add_argument("--start", help="Only trades with entry_time >= START (e.g. 2025-01-01)")
+    parser.add_argument("--end", help="Only trades with entry_time < END")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Detection processes and worker threads (default: CPU count)")
+    parser.add_argument("--time-window", type=float, default=1.0, help="Mirror-trade window in seconds (default: 1.0)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only report errors")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    log = (lambda message: None) if args.quiet else print
+    try:
+        if args.workers < 1:
+            raise ValueError("--workers must be at least 1")
+        pa.set_cpu_count(args.workers)
+        partners, subs, clients, trades = load_dataset(args.source, args.start, args.end)
+        log(f"Loaded {len(trades):,} trades across {len(clients):,} clients from {args.source}.")
+        os.makedirs(args.output, exist_ok=True)
+        findings = run_batch(partners, subs, clients, trades, args.output, args.workers, args.time_window, log)
+    except Exception as e:
+        print(f"PRISM batch run failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    counts = findings['counts']
+    log(", ".join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items()) + f" -> {args.output}")
+    detector_findings = counts['rings'] + counts['bonus_abuse'] + counts['commission_inflation'] + counts['regime_alerts']
+    return EXIT_FINDINGS if detector_findings else EXIT_CLEAN
+
+
+if __name__ == "__main__":
+    sys.exit(main())
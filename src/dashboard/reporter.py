@@ -1,11 +1,13 @@
 import pandas as pd
 import base64
 from datetime import datetime
+from src.engine.metrics import instrument
 
 class PRISMReporter:
     def __init__(self):
         pass
 
+    @instrument("reporter.generate_html_report")
     def generate_html_report(self, ring_id, evidence, attribution, graph_bytes=None):
         """
         Generates a standalone, professional HTML evidence brief.
@@ -4,23 +4,54 @@ from faker import Faker
 import networkx as nx
 import random
 import os
+import json
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from src.data.storage import PRISMDataStore
 
 fake = Faker()
 
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "BTCUSD", "ETHUSD", "Gold", "Oil"]
+BASE_TIME = datetime(2025, 1, 1, 10, 0, 0)
+# Fixed vectorized trade schema, so every shard/part file has identical column types
+TRADE_COLUMNS = ["trade_id", "client_id", "symbol", "direction", "volume", "entry_time", "exit_time",
+                 "profit", "trade_type", "is_fraud", "fraud_ring_id", "note"]
+TRADE_CATEGORIES = {
+    "symbol": pd.CategoricalDtype(SYMBOLS),
+    "direction": pd.CategoricalDtype(["Buy", "Sell"]),
+    "trade_type": pd.CategoricalDtype(["Legit", "CommissionFarming", "Mirror", "BonusAbuse"]),
+}
+
 class PRISMDataGenerator:
-    def __init__(self, seed=42):
+    def __init__(self, seed=42, name_pool_size=1000):
+        """
+        seed drives both modes: the legacy row-by-row generators use the global
+        random/Faker state, the vectorized ones a NumPy Generator plus a Faker name pool.
+        """
         self.seed = seed
+        self.name_pool_size = name_pool_size
         Faker.seed(seed)
         random.seed(seed)
         np.random.seed(seed)
+        self.rng = np.random.default_rng(seed)
+        self._name_pool = None
         
-    def generate_hierarchy(self, num_partners=5, subs_per_partner=3, clients_per_sub=10):
+    def generate_hierarchy(self, num_partners=5, subs_per_partner=3, clients_per_sub=10, vectorized=False, partner_offset=0):
+        """
+        vectorized: build IDs with array ops and draw names from a cached Faker pool
+        (needed for millions of clients).
+        partner_offset: first partner number relative to P-1000, so independently
+        generated shards get disjoint IDs.
+        """
+        if vectorized:
+            return self._generate_hierarchy_vectorized(num_partners, subs_per_partner, clients_per_sub, partner_offset)
+
         partners = []
         subs = []
         clients = []
         
-        for i in range(num_partners):
+        for i in range(partner_offset, partner_offset + num_partners):
             p_id = f"P-{1000 + i}"
             partners.append({
                 "partner_id": p_id,
@@ -61,13 +92,22 @@ class PRISMDataGenerator:
                     
         return pd.DataFrame(partners), pd.DataFrame(subs), pd.DataFrame(clients)
 
-    def generate_trades(self, clients_df, subs_df, num_trades_multiplier=20, mirror_fraud_groups=1, bonus_abuse_count=5, regime_shift_config=None):
+    def generate_trades(self, clients_df, subs_df=None, num_trades_multiplier=20, mirror_fraud_groups=1, bonus_abuse_count=5, regime_shift_config=None, days=30, vectorized=False):
+        """
+        subs_df: marks commission-farmer subs; without it no client is farmed.
+        days: length of the simulated trading period.
+        vectorized: draw every client's trades as NumPy arrays in one pass (benchmark scale).
+        """
+        if vectorized:
+            return self._generate_trades_vectorized(clients_df, subs_df, num_trades_multiplier, mirror_fraud_groups,
+                                                    bonus_abuse_count, regime_shift_config, days)
+
         trades = []
-        base_time = datetime(2025, 1, 1, 10, 0, 0)
-        symbols = ["EURUSD", "GBPUSD", "USDJPY", "BTCUSD", "ETHUSD", "Gold", "Oil"]
+        base_time = BASE_TIME
+        symbols = SYMBOLS
         
         # Helper to check if client belongs to commission farmer
-        farmer_subs = subs_df[subs_df['is_commission_farmer'] == True]['sub_affiliate_id'].tolist()
+        farmer_subs = self._farmer_subs(subs_df)
         
         # Regime Shift Logic: "Sleeper" Partners
         # If config provided: {'partner_id': 'P-1004', 'start_day': 25, 'volume_mult': 5.0}
@@ -98,8 +138,8 @@ class PRISMDataGenerator:
                 avg_volume = round(random.uniform(0.1, 2.0), 2)
 
             for t in range(num_trades):
-                # Distribute trades over 30 days
-                trade_offset_seconds = random.randint(0, 86400 * 30)
+                # Distribute trades over the simulated period
+                trade_offset_seconds = random.randint(0, 86400 * days)
                 entry_time = base_time + timedelta(seconds=trade_offset_seconds)
                 
                 # Apply Regime Shift if applicable
@@ -133,7 +173,7 @@ class PRISMDataGenerator:
             fraud_clients = clients_df.sample(random.randint(3, 8))["client_id"].tolist()
             ring_id = f"RING-MIRROR-{g}"
             for t in range(10): 
-                entry_time = base_time + timedelta(seconds=random.randint(0, 86400 * 30))
+                entry_time = base_time + timedelta(seconds=random.randint(0, 86400 * days))
                 exit_time = entry_time + timedelta(seconds=random.randint(60, 600))
                 symbol = random.choice(symbols)
                 direction = random.choice(["Buy", "Sell"])
@@ -175,15 +215,306 @@ class PRISMDataGenerator:
 
         return pd.DataFrame(trades)
 
-    def save_data(self, partners, subs, clients, trades, output_dir="data"):
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        partners.to_csv(f"{output_dir}/partners.csv", index=False)
-        subs.to_csv(f"{output_dir}/subs.csv", index=False)
-        clients.to_csv(f"{output_dir}/clients.csv", index=False)
-        trades.to_csv(f"{output_dir}/trades.csv", index=False)
+    def _farmer_subs(self, subs_df):
+        if subs_df is None or 'is_commission_farmer' not in subs_df.columns:
+            return []
+        return subs_df[subs_df['is_commission_farmer'] == True]['sub_affiliate_id'].tolist()
+
+    def name_pool(self):
+        """Faker values generated once per generator and sampled by index afterwards."""
+        if self._name_pool is None:
+            faker = Faker()
+            faker.seed_instance(self.seed)
+            size = self.name_pool_size
+            self._name_pool = {
+                "company": np.array([faker.company() for _ in range(size)], dtype=object),
+                "country": np.array([faker.country() for _ in range(size)], dtype=object),
+                "name": np.array([faker.name() for _ in range(size)], dtype=object),
+                "city": np.array([faker.city() for _ in range(size)], dtype=object),
+                "email": np.array([faker.email() for _ in range(size)], dtype=object),
+            }
+        return self._name_pool
+
+    def _sample(self, field, n):
+        pool = self.name_pool()[field]
+        return pool[self.rng.integers(0, len(pool), n)]
+
+    def _random_dates(self, n, start_days_ago, end_days_ago):
+        today = np.datetime64(datetime.now().date(), 'D')
+        return today - self.rng.integers(end_days_ago, start_days_ago + 1, n).astype('timedelta64[D]')
+
+    def _generate_hierarchy_vectorized(self, num_partners, subs_per_partner, clients_per_sub, partner_offset):
+        partner_numbers = np.arange(partner_offset, partner_offset + num_partners)
+        partner_ids = pd.Series(partner_numbers + 1000).astype(str).radd("P-")
+        partners = pd.DataFrame({
+            "partner_id": partner_ids,
+            "name": self._sample("company", num_partners),
+            "country": self._sample("country", num_partners),
+            "join_date": self._random_dates(num_partners, 730, 365),
+            "risk_profile": "Standard" # Default
+        })
+
+        # Subs: partner-major, numbered 100.. within each partner
+        sub_partner = np.repeat(np.arange(num_partners), subs_per_partner)
+        sub_number = np.tile(np.arange(subs_per_partner), num_partners)
+        sub_ids = "S-" + partner_ids.to_numpy()[sub_partner] + "-" + pd.Series(sub_number + 100).astype(str).to_numpy()
+        # Same single "Commission Farmer" as the row-by-row mode: first sub of partner P-1000
+        is_farmer = (partner_numbers[sub_partner] == 0) & (sub_number == 0)
+        n_subs = len(sub_ids)
+        subs = pd.DataFrame({
+            "sub_affiliate_id": sub_ids,
+            "parent_partner_id": partner_ids.to_numpy()[sub_partner],
+            "name": self._sample("name", n_subs),
+            "region": self._sample("city", n_subs),
+            "is_commission_farmer": is_farmer
+        })
+
+        # Commission farmers have MORE clients, but low quality
+        sizes = np.where(is_farmer, clients_per_sub * 3, clients_per_sub)
+        client_sub = np.repeat(np.arange(n_subs), sizes)
+        client_number = np.arange(len(client_sub)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        n_clients = len(client_sub)
+        clients = pd.DataFrame({
+            "client_id": "C-" + sub_ids[client_sub] + "-" + pd.Series(client_number + 10000).astype(str).to_numpy(),
+            "parent_sub_id": sub_ids[client_sub],
+            "master_partner_id": subs["parent_partner_id"].to_numpy()[client_sub],
+            "name": self._sample("name", n_clients),
+            "email": self._sample("email", n_clients),
+            "account_type": np.array(["Standard", "Raw", "Premium"], dtype=object)[self.rng.integers(0, 3, n_clients)],
+            "registration_date": self._random_dates(n_clients, 365, 0)
+        })
+        return partners, subs, clients
+
+    def _generate_trades_vectorized(self, clients_df, subs_df, num_trades_multiplier, mirror_fraud_groups,
+                                    bonus_abuse_count, regime_shift_config, days):
+        client_ids = clients_df['client_id'].to_numpy()
+        regular = self._regular_trades_vectorized(clients_df, subs_df, num_trades_multiplier, regime_shift_config, days)
+        mirror = self._mirror_trades_vectorized(client_ids, mirror_fraud_groups, days)
+        bonus = self._bonus_trades_vectorized(client_ids, bonus_abuse_count)
+        return _finalize_trades(pd.concat([regular, mirror, bonus], ignore_index=True))
+
+    def _regular_trades_vectorized(self, clients_df, subs_df, num_trades_multiplier, regime_shift_config, days):
+        rng = self.rng
+        n_clients = len(clients_df)
+        base = np.datetime64(BASE_TIME, 'ns')
+        second = np.timedelta64(1_000_000_000, 'ns')
+
+        # Per-client profile (Commission Inflation: many tiny, short trades)
+        farmed = clients_df['parent_sub_id'].isin(self._farmer_subs(subs_df)).to_numpy()
+        num_trades = np.where(farmed, rng.integers(50, 101, n_clients), rng.integers(5, num_trades_multiplier + 1, n_clients))
+        avg_duration = np.where(farmed, rng.integers(5, 61, n_clients), rng.integers(300, 3601, n_clients)).astype(np.float64)
+        avg_volume = np.where(farmed, 0.01, np.round(rng.uniform(0.1, 2.0, n_clients), 2))
+
+        # Regime Shift Logic: "Sleeper" Partners (the last matching config wins, as in the row-by-row mode)
+        shift_start = np.full(n_clients, np.iinfo(np.int64).max, dtype=np.int64)
+        vol_mult = np.ones(n_clients)
+        for sleeper in regime_shift_config or []:
+            member = (clients_df['master_partner_id'] == sleeper['partner_id']).to_numpy()
+            shift_start[member] = sleeper['start_day'] * 86400
+            vol_mult[member] = float(sleeper['volume_mult'])
+
+        # One row per trade, grouped by client
+        owner = np.repeat(np.arange(n_clients), num_trades)
+        n = len(owner)
+        sequence = np.arange(n) - np.repeat(np.cumsum(num_trades) - num_trades, num_trades)
+        offsets = rng.integers(0, 86400 * days + 1, n)
+        shifted = offsets > shift_start[owner]
+
+        volume = np.where(shifted, avg_volume[owner] * vol_mult[owner], avg_volume[owner])
+        mean_duration = np.where(shifted, np.maximum(1, (avg_duration[owner] * 0.1).astype(np.int64)), avg_duration[owner])
+        duration = np.maximum(1, rng.normal(mean_duration, mean_duration * 0.2).astype(np.int64))
+        entry_time = base + offsets * second
+        is_farmed = farmed[owner]
+
+        # IDs are joined as Arrow strings; sequence numbers are small, so format each once
+        owner_ids = clients_df['client_id'].astype(str).take(owner).reset_index(drop=True)
+        sequence_text = pd.Series(np.arange(num_trades.max(initial=0) + 1)).astype(str).take(sequence).reset_index(drop=True)
+
+        regular = pd.DataFrame({
+            "trade_id": "T-" + owner_ids + "-" + sequence_text,
+            "client_id": owner_ids,
+            "symbol": pd.Categorical.from_codes(rng.integers(0, len(SYMBOLS), n), dtype=TRADE_CATEGORIES["symbol"]),
+            "direction": pd.Categorical.from_codes(rng.integers(0, 2, n), dtype=TRADE_CATEGORIES["direction"]),
+            "volume": np.round(volume, 2),
+            "entry_time": entry_time,
+            "exit_time": entry_time + duration * second,
+            "profit": np.round(np.where(is_farmed, rng.uniform(-10, 10, n), rng.uniform(-100, 150, n)), 2),
+            "trade_type": pd.Categorical.from_codes(is_farmed.astype(np.int8), dtype=TRADE_CATEGORIES["trade_type"]),
+            "is_fraud": False
+        })
+        return regular
+
+    def _mirror_trades_vectorized(self, client_ids, mirror_fraud_groups, days, first_ring=0):
+        """Inject Mirror Trading (Phase 1): 10 synchronized events per ring, rings numbered from first_ring."""
+        rng = self.rng
+        n_clients = len(client_ids)
+        base = np.datetime64(BASE_TIME, 'ns')
+        second = np.timedelta64(1_000_000_000, 'ns')
+        mirror = []
+        for g in range(first_ring, first_ring + mirror_fraud_groups):
+            ring = client_ids[rng.choice(n_clients, size=min(n_clients, rng.integers(3, 9)), replace=False)]
+            events = 10
+            event = np.repeat(np.arange(events), len(ring))
+            members = np.tile(ring, events)
+            event_entry = base + rng.integers(0, 86400 * days + 1, events) * second
+            event_exit = event_entry + rng.integers(60, 601, events) * second
+            jitter = (rng.uniform(0.001, 0.5, len(event)) * 1e9).astype(np.int64).astype('timedelta64[ns]')
+            mirror.append(pd.DataFrame({
+                "trade_id": "T-FRAUD-" + members + "-" + event.astype(str).astype(object),
+                "client_id": members,
+                "symbol": np.array(SYMBOLS, dtype=object)[rng.integers(0, len(SYMBOLS), events)][event],
+                "direction": np.array(["Buy", "Sell"], dtype=object)[rng.integers(0, 2, events)][event],
+                "volume": np.round(rng.uniform(1.0, 10.0, events), 2)[event],
+                "entry_time": event_entry[event] + jitter,
+                "exit_time": event_exit[event] + jitter,
+                "profit": np.round(rng.uniform(50, 500, len(event)), 2),
+                "trade_type": "Mirror",
+                "is_fraud": True,
+                "fraud_ring_id": f"RING-MIRROR-{g}"
+            }))
+        return pd.concat(mirror, ignore_index=True) if mirror else pd.DataFrame(columns=TRADE_COLUMNS)
+
+    def _bonus_trades_vectorized(self, client_ids, bonus_abuse_count):
+        """Inject Bonus Abuse (Phase 2)"""
+        rng = self.rng
+        n_clients = len(client_ids)
+        base = np.datetime64(BASE_TIME, 'ns')
+        second = np.timedelta64(1_000_000_000, 'ns')
+        abusers = client_ids[rng.choice(n_clients, size=min(n_clients, bonus_abuse_count), replace=False)]
+        bonus_entry = base + rng.integers(0, 86400 * 5 + 1, len(abusers)) * second
+        bonus = pd.DataFrame({
+            "trade_id": "T-BONUS-" + abusers,
+            "client_id": abusers,
+            "symbol": "EURUSD",
+            "direction": "Buy",
+            "volume": 5.0, # Max leverage
+            "entry_time": bonus_entry,
+            "exit_time": bonus_entry + 30 * second, # Quick exit
+            "profit": 0.0,
+            "trade_type": "BonusAbuse",
+            "is_fraud": True,
+            "note": "Immediate Withdrawal Triggered"
+        })
+        return bonus
+
+    def generate_sharded(self, output_dir, num_shards=4, partners_per_shard=5, subs_per_partner=3, clients_per_sub=10,
+                         num_trades_multiplier=20, mirror_fraud_groups=1, bonus_abuse_count=5, regime_shift_config=None,
+                         days=30, clients_per_part=50_000, n_workers=1):
+        """
+        Generates a corpus too large to hold in memory. The partner range is split into
+        num_shards shards; each shard gets its own seed derived from self.seed (so output
+        does not depend on n_workers) and streams its tables to Parquet part files in the
+        PRISMDataStore layout, clients_per_part clients' trades at a time. Mirror rings and
+        bonus abusers are injected per shard. manifest.json records per-shard counts and
+        the ground-truth fraud labels; per-trade labels go to labels/<shard>.parquet.
+        n_workers: process count; 1 runs in-process, None uses every core.
+        Returns the manifest dict.
+        """
+        for name in PRISMDataStore.TABLES + ("labels",):
+            shutil.rmtree(os.path.join(output_dir, name), ignore_errors=True)
+
+        seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(self.seed).spawn(num_shards)]
+        tasks = [{
+            "output_dir": output_dir, "shard": shard, "seed": seed,
+            "partners_per_shard": partners_per_shard, "subs_per_partner": subs_per_partner,
+            "clients_per_sub": clients_per_sub, "num_trades_multiplier": num_trades_multiplier,
+            "mirror_fraud_groups": mirror_fraud_groups, "bonus_abuse_count": bonus_abuse_count,
+            "regime_shift_config": regime_shift_config, "days": days, "clients_per_part": clients_per_part
+        } for shard, seed in enumerate(seeds)]
+
+        n_workers = n_workers or os.cpu_count() or 1
+        if n_workers <= 1 or num_shards <= 1:
+            shards = [_generate_shard(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(n_workers, num_shards)) as pool:
+                shards = list(pool.map(_generate_shard, tasks))
+
+        manifest = {
+            "seed": self.seed,
+            "days": days,
+            "base_time": BASE_TIME.isoformat(),
+            "regime_shift_config": regime_shift_config or [],
+            "totals": {key: sum(s[key] for s in shards) for key in ("partners", "subs", "clients", "trades", "fraud_trades")},
+            "shards": shards
+        }
+        with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def write_shard(self, output_dir, shard, partners_per_shard, subs_per_partner, clients_per_sub, num_trades_multiplier,
+                    mirror_fraud_groups, bonus_abuse_count, regime_shift_config, days, clients_per_part, **_):
+        """Generates and writes one shard; returns its manifest entry."""
+        store = PRISMDataStore(output_dir)
+        name = f"{shard:05d}"
+        partners, subs, clients = self.generate_hierarchy(partners_per_shard, subs_per_partner, clients_per_sub,
+                                                          vectorized=True, partner_offset=shard * partners_per_shard)
+        store.write_part("partners", partners, name)
+        store.write_part("subs", subs, name)
+        store.write_part("clients", clients, name)
+
+        # Regular trades, streamed a slice of clients at a time
+        trade_count = 0
+        for part, start in enumerate(range(0, len(clients), clients_per_part)):
+            batch = self._regular_trades_vectorized(clients.iloc[start:start + clients_per_part], subs,
+                                                    num_trades_multiplier, regime_shift_config, days)
+            store.write_part("trades", _finalize_trades(batch), f"{name}-{part:05d}")
+            trade_count += len(batch)
+
+        # Injected fraud for this shard, written as its own part plus the label file
+        client_ids = clients['client_id'].to_numpy()
+        fraud = _finalize_trades(pd.concat([
+            self._mirror_trades_vectorized(client_ids, mirror_fraud_groups, days, first_ring=shard * mirror_fraud_groups),
+            self._bonus_trades_vectorized(client_ids, bonus_abuse_count)
+        ], ignore_index=True))
+        store.write_part("trades", fraud, f"{name}-fraud")
+        labels = fraud[["trade_id", "client_id", "trade_type", "is_fraud", "fraud_ring_id"]]
+        os.makedirs(os.path.join(output_dir, "labels"), exist_ok=True)
+        labels.to_parquet(os.path.join(output_dir, "labels", f"{name}.parquet"), index=False)
+
+        mirror = fraud[fraud['trade_type'] == "Mirror"]
+        return {
+            "shard": shard,
+            "seed": self.seed,
+            "partner_ids": partners['partner_id'].tolist(),
+            "partners": len(partners),
+            "subs": len(subs),
+            "clients": len(clients),
+            "trades": trade_count + len(fraud),
+            "fraud_trades": len(fraud),
+            "rings": {ring: sorted(group.unique().tolist()) for ring, group in mirror.groupby('fraud_ring_id')['client_id']},
+            "bonus_abusers": fraud.loc[fraud['trade_type'] == "BonusAbuse", 'client_id'].tolist(),
+            "commission_farmer_subs": self._farmer_subs(subs)
+        }
+
+    def save_data(self, partners, subs, clients, trades, output_dir="data", file_format="parquet"):
+        """Writes the four tables as Parquet (PRISMDataStore) or, with file_format='csv', as CSV."""
+        if file_format == "parquet":
+            PRISMDataStore(output_dir).write_all(partners, subs, clients, trades)
+        else:
+            if not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+            partners.to_csv(f"{output_dir}/partners.csv", index=False)
+            subs.to_csv(f"{output_dir}/subs.csv", index=False)
+            clients.to_csv(f"{output_dir}/clients.csv", index=False)
+            trades.to_csv(f"{output_dir}/trades.csv", index=False)
         print(f"Data saved to {output_dir}/")
 
+def _generate_shard(task):
+    """Process-pool entry point: one generator per shard, seeded for that shard."""
+    return PRISMDataGenerator(seed=task["seed"]).write_shard(**task)
+
+
+def _finalize_trades(trades):
+    """Applies the fixed vectorized trade schema (column order, categories, nullable string label columns)."""
+    trades = trades.reindex(columns=TRADE_COLUMNS)
+    for col, dtype in TRADE_CATEGORIES.items():
+        trades[col] = trades[col].astype(dtype)
+    for col in ("fraud_ring_id", "note"):
+        # Nullable string dtype: missing labels stay missing ("str" renders NaN as "nan" before pandas 3)
+        trades[col] = trades[col].astype("string")
+    trades["is_fraud"] = trades["is_fraud"].astype(bool)
+    return trades
+
 if __name__ == "__main__":
     generator = PRISMDataGenerator()
     p, s, c = generator.generate_hierarchy(num_partners=5, subs_per_partner=3, clients_per_sub=10)
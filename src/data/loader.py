@@ -1,10 +1,22 @@
 import pandas as pd
 import io
+import sqlalchemy as sa
+from pandas.api.types import union_categoricals
 from src.data.data_generator import PRISMDataGenerator
 
 class PRISMDataLoader:
-    def __init__(self):
+    # Compact dtypes for the trade table (by PRISM column name)
+    TRADE_DTYPES = {"symbol": "category", "direction": "category", "volume": "float32"}
+    TRADE_DATE_COLUMNS = ["entry_time", "exit_time"]
+    # Default source table per PRISM table for load_from_db
+    DB_TABLES = {"Partners": "partners", "Sub-Affiliates": "subs", "Clients": "clients", "Trades": "trades"}
+
+    def __init__(self, chunksize=500_000):
+        """chunksize: rows per chunk when streaming the trade file."""
         self.generator = PRISMDataGenerator()
+        self.chunksize = chunksize
+        self._engines = {}  # Pooled SQLAlchemy engines per connection string
+        self.last_watermark = None
 
     def load_synthetic(self, num_partners=5, subs_per_partner=3, clients_per_sub=10):
         """Generates synthetic data using PRISMDataGenerator."""
@@ -31,46 +43,135 @@ class PRISMDataLoader:
         column_mapping: dict of {table_name: {user_col: prism_col}}
         """
         try:
-            # Read files
-            p_df = pd.read_csv(partners_file)
-            s_df = pd.read_csv(subs_file)
-            c_df = pd.read_csv(clients_file)
-            t_df = pd.read_csv(trades_file)
-            
-            # Apply mappings if provided
-            if column_mapping:
-                if "Partners" in column_mapping: p_df = p_df.rename(columns=column_mapping["Partners"])
-                if "Sub-Affiliates" in column_mapping: s_df = s_df.rename(columns=column_mapping["Sub-Affiliates"])
-                if "Clients" in column_mapping: c_df = c_df.rename(columns=column_mapping["Clients"])
-                if "Trades" in column_mapping: t_df = t_df.rename(columns=column_mapping["Trades"])
-
-            # Validate
+            column_mapping = column_mapping or {}
             req = self.get_required_columns()
-            self._validate_columns(p_df, req["Partners"])
-            self._validate_columns(s_df, req["Sub-Affiliates"])
-            self._validate_columns(c_df, req["Clients"])
-            self._validate_columns(t_df, req["Trades"])
             
-            # Conversions
-            for df in [t_df]:
-                if 'entry_time' in df.columns: df['entry_time'] = pd.to_datetime(df['entry_time'])
-                if 'exit_time' in df.columns: df['exit_time'] = pd.to_datetime(df['exit_time'])
+            p_df = self._read_table(partners_file, req["Partners"], column_mapping.get("Partners"))
+            s_df = self._read_table(subs_file, req["Sub-Affiliates"], column_mapping.get("Sub-Affiliates"))
+            c_df = self._read_table(clients_file, req["Clients"], column_mapping.get("Clients"))
+            t_df = self._read_table(
+                trades_file, req["Trades"], column_mapping.get("Trades"),
+                dtypes=self.TRADE_DTYPES, date_columns=self.TRADE_DATE_COLUMNS, chunksize=self.chunksize
+            )
 
             return p_df, s_df, c_df, t_df
         except Exception as e:
             raise ValueError(f"Ingestion failed: {str(e)}")
 
+    def _read_table(self, source, required_cols, mapping=None, dtypes=None, date_columns=(), chunksize=None):
+        """
+        Reads one CSV table. The header is read and validated (after mapping) before any
+        rows; rows are then parsed with explicit dtypes and dates, in chunks if chunksize is set.
+        """
+        mapping = mapping or {}
+        header = pd.read_csv(source, nrows=0).columns
+        renamed = [mapping.get(col, col) for col in header]
+        self._validate_columns(pd.DataFrame(columns=renamed), required_cols)
+        self._rewind(source)
+
+        # dtypes/dates are keyed by PRISM names; read_csv needs the file's own names
+        source_name = {prism: raw for raw, prism in zip(header, renamed)}
+        dtype = {source_name[col]: d for col, d in (dtypes or {}).items() if col in source_name}
+        parse_dates = [source_name[col] for col in date_columns if col in source_name]
+
+        reader = pd.read_csv(source, dtype=dtype or None, parse_dates=parse_dates or None, chunksize=chunksize)
+        df = self._concat_chunks(reader) if chunksize else reader
+        return df.rename(columns=mapping) if mapping else df
+
+    def _concat_chunks(self, chunks, columns=None):
+        """
+        Concatenates chunks, merging per-chunk categories instead of falling back to object.
+        columns gives the empty frame's header when there are no chunks at all.
+        """
+        chunks = list(chunks)
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        if len(chunks) == 1:
+            return chunks[0]
+        columns = chunks[0].columns
+        categorical = [col for col, dtype in chunks[0].dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+        merged = {col: union_categoricals([chunk.pop(col) for chunk in chunks]) for col in categorical}
+        df = pd.concat(chunks, ignore_index=True)
+        for col, values in merged.items():
+            df[col] = values
+        return df[columns]
+
+    def _rewind(self, source):
+        if hasattr(source, "seek"):
+            source.seek(0)
+
+
+    def load_from_db(self, connection_string, since=None, watermark_column="entry_time", table_names=None, column_mapping=None,
+                     since_inclusive=False):
+        """
+        Streams the four tables from a SQL database in chunksize batches over a
+        server-side cursor, reusing one pooled engine per connection string.
+        since: only trades with watermark_column > since are pulled (incremental runs);
+        the newest value seen is kept in self.last_watermark for the next call.
+        since_inclusive: use watermark_column >= since instead (a range start rather than a watermark).
+        table_names: optional {table_name: source table} overrides of DB_TABLES.
+        """
+        try:
+            column_mapping = column_mapping or {}
+            tables = {**self.DB_TABLES, **(table_names or {})}
+            req = self.get_required_columns()
+            engine = self._get_engine(connection_string)
+            
+            with engine.connect() as conn:
+                conn = conn.execution_options(stream_results=True, max_row_buffer=self.chunksize)
+                p_df = self._read_sql_table(conn, tables["Partners"], req["Partners"], column_mapping.get("Partners"))
+                s_df = self._read_sql_table(conn, tables["Sub-Affiliates"], req["Sub-Affiliates"], column_mapping.get("Sub-Affiliates"))
+                c_df = self._read_sql_table(conn, tables["Clients"], req["Clients"], column_mapping.get("Clients"))
+                t_df = self._read_sql_table(
+                    conn, tables["Trades"], req["Trades"], column_mapping.get("Trades"),
+                    dtypes=self.TRADE_DTYPES, date_columns=self.TRADE_DATE_COLUMNS,
+                    watermark_column=watermark_column, since=since, since_inclusive=since_inclusive
+                )
+            
+            latest = t_df[watermark_column].max() if len(t_df) else None
+            self.last_watermark = latest if latest is not None and not pd.isna(latest) else since
+            return p_df, s_df, c_df, t_df
+        except Exception as e:
+            raise ValueError(f"Database ingestion failed: {str(e)}")
+
+    def _get_engine(self, connection_string):
+        engine = self._engines.get(connection_string)
+        if engine is None:
+            engine = self._engines[connection_string] = sa.create_engine(connection_string, pool_pre_ping=True)
+        return engine
 
-    def load_from_db(self, connection_string):
+    def _read_sql_table(self, conn, table, required_cols, mapping=None, dtypes=None, date_columns=(),
+                        watermark_column=None, since=None, since_inclusive=False):
         """
-        Mock implementation for Database connection.
-        In a real app, this would use SQLAlchemy or similar.
+        Reads one table in batches. Columns are validated (after mapping) from the
+        database schema before any rows are fetched; dtypes/date_columns use PRISM names.
         """
-        # Simulate connection check
-        if "mock" in connection_string.lower():
-            return True, "Connected to Mock Database (Success)"
-        else:
-            return False, "Database connection failed: Invalid credentials"
+        mapping = mapping or {}
+        header = [col["name"] for col in sa.inspect(conn).get_columns(table)]
+        if not header:
+            raise ValueError(f"Table not found: {table}")
+        renamed = [mapping.get(col, col) for col in header]
+        self._validate_columns(pd.DataFrame(columns=renamed), required_cols)
+
+        source_name = {prism: raw for raw, prism in zip(header, renamed)}
+        dtype = {source_name[col]: d for col, d in (dtypes or {}).items() if col in source_name}
+        parse_dates = [source_name[col] for col in date_columns if col in source_name]
+
+        query = sa.select(sa.text("*")).select_from(sa.table(table))
+        if watermark_column is not None:
+            watermark = sa.column(source_name.get(watermark_column, watermark_column), sa.DateTime())
+            if since is not None:
+                bound = pd.Timestamp(since)
+                if since_inclusive:
+                    # > (since - 1us) rather than >=: SQLite compares datetimes as text, and the bound
+                    # renders with microseconds ('... 00:00:00.000000' sorts after a stored '... 00:00:00')
+                    bound -= pd.Timedelta(microseconds=1)
+                query = query.where(watermark > bound.to_pydatetime())
+            query = query.order_by(watermark)
+
+        chunks = pd.read_sql(query, conn, parse_dates=parse_dates or None, dtype=dtype or None, chunksize=self.chunksize)
+        df = self._concat_chunks(chunks, columns=header)
+        return df.rename(columns=mapping) if mapping else df
 
     def _validate_columns(self, df, required_cols):
         missing = [col for col in required_cols if col not in df.columns]
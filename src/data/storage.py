@@ -0,0 +1,99 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class PRISMDataStore:
+    """
+    Columnar Parquet storage for the four PRISM tables.
+
+    IDs, symbols and directions are dictionary-encoded on disk. Trades are written in
+    entry_time order with bounded row groups, so entry_time range filters skip whole
+    row groups from their statistics. Reads project columns and memory-map the file.
+    """
+
+    TABLES = ("partners", "subs", "clients", "trades")
+    # Columns worth dictionary-encoding (repeated IDs and low-cardinality labels)
+    DICTIONARY_COLUMNS = [
+        "partner_id", "sub_affiliate_id", "parent_partner_id", "client_id", "parent_sub_id",
+        "master_partner_id", "trade_id", "symbol", "direction", "trade_type", "fraud_ring_id"
+    ]
+    # Read back as pandas categoricals, matching PRISMDataLoader's trade dtypes
+    CATEGORICAL_COLUMNS = ["symbol", "direction"]
+    # The only trade columns mirror-trade detection needs
+    DETECTION_COLUMNS = ["trade_id", "client_id", "symbol", "direction", "entry_time"]
+
+    def __init__(self, root="data", row_group_size=250_000):
+        self.root = root
+        self.row_group_size = row_group_size
+
+    def path(self, name):
+        """A table is either one file (<name>.parquet) or a directory of part files (<name>/)."""
+        directory = os.path.join(self.root, name)
+        return directory if os.path.isdir(directory) else f"{directory}.parquet"
+
+    def exists(self):
+        return all(os.path.exists(self.path(name)) for name in self.TABLES)
+
+    def write_table(self, name, df):
+        """Writes one table; trades are sorted by entry_time so range filters can prune row groups."""
+        self._write(name, df, self.path(name))
+
+    def write_part(self, name, df, part):
+        """
+        Writes one part file of a partitioned table (<root>/<name>/<part>.parquet).
+        Parts are read back together as one table; they must share a schema.
+        """
+        os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        path = os.path.join(self.root, name, f"{part}.parquet")
+        self._write(name, df, path)
+        return path
+
+    def _write(self, name, df, path):
+        if name not in self.TABLES:
+            raise ValueError(f"Unknown table: {name}")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if name == "trades" and "entry_time" in df.columns:
+            df = df.assign(entry_time=pd.to_datetime(df["entry_time"])).sort_values("entry_time", kind="stable")
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(
+            table, path,
+            use_dictionary=[c for c in self.DICTIONARY_COLUMNS if c in table.column_names],
+            row_group_size=self.row_group_size
+        )
+
+    def write_all(self, partners, subs, clients, trades):
+        for name, df in zip(self.TABLES, (partners, subs, clients, trades)):
+            self.write_table(name, df)
+
+    def read_table(self, name, columns=None, start=None, end=None):
+        """
+        Reads one table. columns projects a subset; start/end keep trades with
+        start <= entry_time < end, pushed down to the Parquet reader.
+        """
+        filters = []
+        if start is not None:
+            filters.append(("entry_time", ">=", pd.Timestamp(start).to_pydatetime()))
+        if end is not None:
+            filters.append(("entry_time", "<", pd.Timestamp(end).to_pydatetime()))
+
+        table = pq.read_table(
+            self.path(name),
+            columns=columns,
+            filters=filters or None,
+            memory_map=True,
+            read_dictionary=[c for c in self.CATEGORICAL_COLUMNS if columns is None or c in columns]
+        )
+        return table.to_pandas()
+
+    def read_all(self, trade_columns=None, start=None, end=None):
+        """Returns (partners, subs, clients, trades), with projection/filters applied to trades."""
+        return (
+            self.read_table("partners"),
+            self.read_table("subs"),
+            self.read_table("clients"),
+            self.read_table("trades", trade_columns, start, end)
+        )
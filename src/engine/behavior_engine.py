@@ -1,5 +1,14 @@
 import pandas as pd
 import numpy as np
+from src.engine.metrics import instrument
+
+
+def _as_datetime(series):
+    """Parses a timestamp column unless it is already datetime-typed."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series)
+
 
 class PRISMBehaviorEngine:
     def __init__(self, min_trade_volume=4.0, max_trade_duration=60, churn_threshold=0.8):
@@ -7,72 +16,97 @@ class PRISMBehaviorEngine:
         self.max_trade_duration = max_trade_duration
         self.churn_threshold = churn_threshold
 
+    @instrument("behavior.detect_bonus_abuse", trades="trades_df")
     def detect_bonus_abuse(self, trades_df, clients_df):
         """
         Detects 'Hit and Run' behavior: High volume, short duration trades 
         immediately followed by inactivity (simulated withdrawal).
+        Runs as a single grouped aggregation over the suspicious trades; the risk
+        score grows with each client's suspicious trade count and volume.
         """
-        # Merge to get registration dates
-        df = trades_df.merge(clients_df[['client_id', 'registration_date']], on='client_id', how='left')
-        df['registration_date'] = pd.to_datetime(df['registration_date'])
-        df['entry_time'] = pd.to_datetime(df['entry_time'])
-        
-        # Calculate trade duration
-        df['duration'] = (pd.to_datetime(df['exit_time']) - df['entry_time']).dt.total_seconds()
+        # Cheap volume filter first, so durations are only derived for candidate rows
+        candidates = trades_df[trades_df['volume'] >= self.min_trade_volume]
+        duration = self.duration_seconds(candidates)
         
         # Filter for suspicious trades: High Volume + Short Duration
-        suspicious_trades = df[
-            (df['volume'] >= self.min_trade_volume) & 
-            (df['duration'] <= self.max_trade_duration)
-        ]
+        suspicious_trades = candidates[duration <= self.max_trade_duration]
         
         # Group by client to find serial abusers
-        abusers = suspicious_trades.groupby('client_id').size().reset_index(name='suspicious_count')
+        abusers = suspicious_trades.groupby('client_id').agg(
+            suspicious_count=('volume', 'size'),
+            suspicious_volume=('volume', 'sum')
+        )
+        risk_scores = self._abuse_risk_score(abusers['suspicious_count'].to_numpy(), abusers['suspicious_volume'].to_numpy())
         
         # Return list of abusive clients with metadata
-        abuse_report = []
-        for pid in abusers['client_id']:
-            client_trades = suspicious_trades[suspicious_trades['client_id'] == pid]
-            abuse_report.append({
-                "client_id": pid,
-                "risk_score": 0.95,
+        return [
+            {
+                "client_id": client_id,
+                "risk_score": round(float(score), 2),
                 "reason": "Bonus Abuse: High-Leverage/Short-Duration Activity",
-                "trade_count": len(client_trades)
-            })
-            
-        return abuse_report
+                "trade_count": int(count),
+                "suspicious_volume": round(float(volume), 2)
+            }
+            for client_id, count, volume, score in zip(
+                abusers.index, abusers['suspicious_count'], abusers['suspicious_volume'], risk_scores
+            )
+        ]
 
+    def _abuse_risk_score(self, counts, volumes):
+        """
+        Saturating score in [0.70, 0.99]: every suspicious trade and every multiple of
+        the leverage threshold traded adds evidence.
+        """
+        evidence_units = counts + volumes / self.min_trade_volume
+        return np.minimum(0.99, 0.70 + 0.29 * (1 - np.exp(-evidence_units / 4)))
+
+    @instrument("behavior.detect_commission_inflation", trades="trades_df")
     def detect_commission_inflation(self, trades_df, clients_df, subs_df):
         """
         Detects specific sub-affiliates generating high volume but low quality traffic (churn).
         Metric: High Turn-Over Rate + Low Avg Trade Duration per Client.
         """
-        # Map clients to sub-affiliates
-        trade_client_merged = trades_df.merge(clients_df[['client_id', 'parent_sub_id']], on='client_id', how='left')
+        # Map clients to sub-affiliates (already joined on a PRISMAnalysisPipeline frame)
+        if 'parent_sub_id' in trades_df.columns:
+            trade_subs = trades_df['parent_sub_id']
+        else:
+            client_to_sub = clients_df.drop_duplicates('client_id').set_index('client_id')['parent_sub_id']
+            trade_subs = trades_df['client_id'].map(client_to_sub)
+        trade_client_merged = pd.DataFrame({
+            'parent_sub_id': trade_subs,
+            'trade_id': trades_df['trade_id'],
+            'client_id': trades_df['client_id'],
+            'volume': trades_df['volume'],
+            'duration_seconds': self.duration_seconds(trades_df)
+        })
         
-        # Aggregate metrics by Sub-Affiliate
+        # Aggregate metrics by Sub-Affiliate (built-in reductions only)
         sub_stats = trade_client_merged.groupby('parent_sub_id').agg(
             total_volume=('volume', 'sum'),
             total_trades=('trade_id', 'count'),
             unique_clients=('client_id', 'nunique'),
-            avg_duration=('exit_time', lambda x: (pd.to_datetime(x) - pd.to_datetime(trade_client_merged.loc[x.index, 'entry_time'])).dt.total_seconds().mean())
+            avg_duration=('duration_seconds', 'mean')
         ).reset_index()
+        sub_stats['avg_duration'] = sub_stats['avg_duration'].astype(np.float64)
         
         # Define "Inflation" criteria
-        # High Volume per Client BUT Low Duration
-        suspicious_subs = []
+        # If avg duration is surprisingly low for the aggregated portfolio AND they have
+        # decent volume, it's likely machine-generated or grim farming.
+        suspicious = (sub_stats['avg_duration'] < 120) & (sub_stats['total_trades'] > 50)
         
-        for _, row in sub_stats.iterrows():
-            avg_vol_per_client = row['total_volume'] / row['unique_clients'] if row['unique_clients'] > 0 else 0
-            
-            # Helper logic: If avg duration is surprisingly low (< 60s) for the aggregated portfolio
-            # AND they have decent volume, it's likely machine-generated or grim farming.
-            if row['avg_duration'] < 120 and row['total_trades'] > 50:
-                 suspicious_subs.append({
-                    "sub_affiliate_id": row['parent_sub_id'],
-                    "risk_score": 0.88,
-                    "reason": "Commission Inflation: High Freq / Low Duration",
-                    "stats": row.to_dict()
-                })
-                
-        return suspicious_subs
+        return [
+            {
+                "sub_affiliate_id": stats['parent_sub_id'],
+                "risk_score": 0.88,
+                "reason": "Commission Inflation: High Freq / Low Duration",
+                "stats": stats
+            }
+            for stats in sub_stats[suspicious].to_dict('records')
+        ]
+
+    def duration_seconds(self, trades_df):
+        """Trade durations in seconds (float32), reusing a precomputed column when present."""
+        if 'duration_seconds' in trades_df.columns:
+            return trades_df['duration_seconds']
+        duration = _as_datetime(trades_df['exit_time']) - _as_datetime(trades_df['entry_time'])
+        return duration.dt.total_seconds().astype(np.float32)
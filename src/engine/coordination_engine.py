@@ -0,0 +1,97 @@
+import pandas as pd
+import numpy as np
+from src.engine.metrics import instrument
+
+
+class PRISMCoordinationEngine:
+    """
+    Scores pairwise client coordination from synchronized trade clusters.
+
+    Builds a sparse client x client co-occurrence matrix in COO form (upper
+    triangle only, aggregated with np.unique), so memory scales with the number
+    of co-trading pairs rather than clients squared.
+    """
+
+    def __init__(self, min_co_occurrences=2):
+        self.min_co_occurrences = min_co_occurrences
+        self._reset()
+
+    def _reset(self):
+        self.client_ids = pd.Index([])
+        self.pair_a = np.empty(0, dtype=np.int32)
+        self.pair_b = np.empty(0, dtype=np.int32)
+        self.counts = np.empty(0, dtype=np.int32)
+        self.scores = np.empty(0, dtype=np.float32)
+
+    @instrument("coordination.build")
+    def build(self, clusters, trades_df=None):
+        """
+        Aggregates co-occurrence counts over all clusters and normalises them by each
+        client's trade frequency: score = shared_events / sqrt(trades_a * trades_b).
+        Without trades_df, cluster participation is used as the frequency.
+        """
+        members = [c['client_ids'] for c in clusters if len(c['client_ids']) > 1]
+        if not members:
+            self._reset()
+            return self
+
+        sizes = np.fromiter((len(m) for m in members), dtype=np.int64, count=len(members))
+        codes, uniques = pd.factorize(np.concatenate([np.asarray(m, dtype=object) for m in members]))
+        self.client_ids = pd.Index(uniques)
+        n_clients = len(uniques)
+
+        # Expand each cluster into its unordered pairs, one vectorized step per cluster size
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        keys = []
+        for size in np.unique(sizes):
+            starts = offsets[sizes == size]
+            block = codes[starts[:, None] + np.arange(size)]
+            a, b = np.triu_indices(size, 1)
+            lo = np.minimum(block[:, a], block[:, b]).ravel().astype(np.int64)
+            hi = np.maximum(block[:, a], block[:, b]).ravel().astype(np.int64)
+            keys.append(lo * n_clients + hi)
+
+        pair_keys, counts = np.unique(np.concatenate(keys), return_counts=True)
+        keep = counts >= self.min_co_occurrences
+        pair_keys, counts = pair_keys[keep], counts[keep]
+
+        self.pair_a = (pair_keys // n_clients).astype(np.int32)
+        self.pair_b = (pair_keys % n_clients).astype(np.int32)
+        self.counts = counts.astype(np.int32)
+
+        if trades_df is not None:
+            frequency = trades_df['client_id'].value_counts().reindex(self.client_ids, fill_value=0).to_numpy()
+        else:
+            frequency = np.bincount(codes, minlength=n_clients)
+        frequency = np.maximum(frequency, 1).astype(np.float64)
+        self.scores = (self.counts / np.sqrt(frequency[self.pair_a] * frequency[self.pair_b])).astype(np.float32)
+        return self
+
+    def top_pairs(self, k=10, client_ids=None):
+        """
+        Returns the k most coordinated pairs, optionally restricted to pairs where
+        both clients belong to client_ids (e.g. a ring).
+        """
+        if k <= 0:
+            return []
+
+        mask = np.ones(len(self.counts), dtype=bool)
+        if client_ids is not None:
+            members = self.client_ids.get_indexer(pd.Index(client_ids).unique())
+            members = members[members >= 0]
+            mask = np.isin(self.pair_a, members) & np.isin(self.pair_b, members)
+
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-self.scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.lexsort((-self.counts[candidates], -self.scores[candidates]))]
+
+        return [
+            {
+                "client_a": self.client_ids[self.pair_a[i]],
+                "client_b": self.client_ids[self.pair_b[i]],
+                "co_occurrences": int(self.counts[i]),
+                "score": round(float(self.scores[i]), 4)
+            }
+            for i in candidates
+        ]
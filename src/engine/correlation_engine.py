@@ -1,95 +1,263 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
+from src.engine.metrics import instrument
+
+
+def _sweep_partition(times, clients, window_ns):
+    """
+    Sweep-line mirror detection over a single (symbol, direction) partition.
+
+    times: int64 nanosecond entry times, sorted ascending.
+    clients: integer client codes aligned with times.
+    Returns a list of (anchor, members) tuples of local positions, in anchor order.
+    """
+    n = len(times)
+    if n < 2:
+        return []
+
+    # Window bounds for every trade: [t, t + window] (ties before the anchor are included)
+    lo = np.searchsorted(times, times, side='left')
+    hi = np.searchsorted(times, times + window_ns, side='right')
+
+    # A window can only produce a cluster if it holds another trade from a different client
+    run_id = np.concatenate(([0], np.cumsum(clients[1:] != clients[:-1])))
+    single_client = (run_id[lo] == run_id[hi - 1]) & (clients[lo] == clients)
+    anchors = np.flatnonzero((hi - lo > 1) & ~single_client)
+    if len(anchors) == 0:
+        return []
+
+    # next_free[k] points at the first unvisited position >= k (path-compressed skip list)
+    next_free = list(range(n + 1))
+
+    def find_free(k):
+        root = k
+        while next_free[root] != root:
+            root = next_free[root]
+        while next_free[k] != root:
+            next_free[k], k = root, next_free[k]
+        return root
+
+    lo = lo.tolist()
+    hi = hi.tolist()
+    clients = clients.tolist()
+    results = []
+
+    for i in anchors.tolist():
+        if find_free(i) != i:
+            continue
+
+        members = []
+        mixed = False
+        j = find_free(lo[i])
+        while j < hi[i]:
+            if j != i:
+                members.append(j)
+                if clients[j] != clients[i]:
+                    mixed = True
+            j = find_free(j + 1)
+
+        if mixed:
+            # Mark all as visited to avoid double counting the same synchronization event
+            next_free[i] = i + 1
+            for j in members:
+                next_free[j] = j + 1
+            results.append((i, members))
+
+    return results
+
+
+def _sweep_partitions(batch, window_ns):
+    """Process-pool entry point: sweeps a batch of (times, clients) partitions."""
+    return [_sweep_partition(times, clients, window_ns) for times, clients in batch]
+
 
 class PRISMCorrelationEngine:
-    def __init__(self, time_window_seconds=1.0):
+    def __init__(self, time_window_seconds=1.0, n_workers=1):
+        """
+        n_workers: process count for partition-parallel detection.
+        1 runs serially in-process; None uses every available core.
+        """
         self.time_window_seconds = time_window_seconds
-        
+        self.n_workers = n_workers
+
+    @instrument("correlation.detect_mirror_trades", trades="trades_df")
     def detect_mirror_trades(self, trades_df):
         """
         Detects groups of trades that are synchronized in time on the same symbol and direction.
+        Trades are partitioned by (symbol, direction), sorted once and swept with a
+        two-pointer window, so the scan runs in O(n log n) instead of O(n^2).
         """
-        # Ensure entry_time is datetime
-        trades_df['entry_time'] = pd.to_datetime(trades_df['entry_time'])
-        
-        # Sort by entry time
-        trades_df = trades_df.sort_values(by='entry_time').reset_index(drop=True)
-        
+        # A PRISMAnalysisPipeline frame already carries parsed times and client ordinals
+        entry_time = trades_df['entry_time']
+        if not pd.api.types.is_datetime64_any_dtype(entry_time):
+            entry_time = pd.to_datetime(entry_time)
+        if 'entry_ns' in trades_df.columns:
+            times = trades_df['entry_ns'].to_numpy()
+        else:
+            times = entry_time.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        valid = ~entry_time.isna().to_numpy()
+
+        # Global time rank (stable) decides anchor order and cluster numbering
+        order = np.argsort(times, kind='stable')
+        rank = np.empty(len(times), dtype=np.int64)
+        rank[order] = np.arange(len(times))
+
+        partition = trades_df.groupby(['symbol', 'direction'], sort=False).ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        valid &= partition >= 0
+        if 'client_ordinal' in trades_df.columns:
+            client_codes = trades_df['client_ordinal'].to_numpy()
+        else:
+            client_codes = pd.factorize(trades_df['client_id'])[0]
+
+        # Sort once by (partition, time rank) and split into contiguous partitions
+        rows = np.flatnonzero(valid)
+        rows = rows[np.lexsort((rank[rows], partition[rows]))]
+        bounds = np.flatnonzero(np.diff(partition[rows])) + 1
+        window_ns = pd.Timedelta(seconds=self.time_window_seconds).value
+
+        partitions = np.split(rows, bounds) if len(rows) else []
+        payload = [(times[p], client_codes[p].astype(np.int32)) for p in partitions]
+        results = self._sweep(payload, window_ns)
+
+        events = []
+        for part_rows, part_results in zip(partitions, results):
+            for anchor, members in part_results:
+                events.append((rank[part_rows[anchor]], part_rows[anchor], part_rows[members]))
+        events.sort(key=lambda e: e[0])
+
+        trade_ids = trades_df['trade_id'].to_numpy()
+        client_ids = trades_df['client_id'].to_numpy()
+        symbols = trades_df['symbol'].to_numpy()
+
         clusters = []
-        visited = set()
-        
-        for i, trade in trades_df.iterrows():
-            if i in visited:
-                continue
-                
-            # Find candidate trades within the time window on the same symbol and direction
-            mask = (
-                (trades_df.index != i) &
-                (~trades_df.index.isin(visited)) &
-                (trades_df['symbol'] == trade['symbol']) &
-                (trades_df['direction'] == trade['direction']) &
-                (trades_df['entry_time'] >= trade['entry_time']) &
-                (trades_df['entry_time'] <= trade['entry_time'] + pd.Timedelta(seconds=self.time_window_seconds))
-            )
-            
-            group = trades_df[mask]
-            if not group.empty:
-                # We found a synchronized group
-                cluster_ids = [trade['trade_id']] + group['trade_id'].tolist()
-                cluster_clients = [trade['client_id']] + group['client_id'].tolist()
-                
-                # Check if it involves more than one client (internal sanity check)
-                if len(set(cluster_clients)) > 1:
-                    clusters.append({
-                        "id": f"CLUSTER-{len(clusters)}",
-                        "trade_ids": cluster_ids,
-                        "client_ids": list(set(cluster_clients)),
-                        "symbol": trade['symbol'],
-                        "entry_time_median": trade['entry_time'],
-                        "count": len(cluster_ids)
-                    })
-                    
-                    # Mark all as visited to avoid double counting the same synchronization event
-                    visited.add(i)
-                    for idx in group.index:
-                        visited.add(idx)
-        
+        for _, anchor, members in events:
+            cluster_rows = np.concatenate(([anchor], members))
+            clusters.append({
+                "id": f"CLUSTER-{len(clusters)}",
+                "trade_ids": trade_ids[cluster_rows].tolist(),
+                "client_ids": list(dict.fromkeys(client_ids[cluster_rows].tolist())),
+                "symbol": symbols[anchor],
+                "entry_time_median": entry_time.iloc[anchor],
+                "count": len(cluster_rows)
+            })
+
         return clusters
 
-    def aggregate_rings(self, clusters):
+    def _sweep(self, payload, window_ns):
         """
-        Groups clusters into potential 'rings' if multiple clusters share the same set of clients.
+        Runs the sweep over every partition, fanning out to a process pool when
+        n_workers allows. Results come back in partition order either way.
         """
-        from collections import defaultdict
-        
-        client_to_ring = {}
-        rings = []
-        
+        n_workers = self.n_workers or os.cpu_count() or 1
+        if n_workers <= 1 or len(payload) <= 1:
+            return _sweep_partitions(payload, window_ns)
+
+        # Balance batches by trade count so one hot symbol does not stall the pool
+        n_batches = min(len(payload), n_workers * 4)
+        batches = [[] for _ in range(n_batches)]
+        loads = np.zeros(n_batches, dtype=np.int64)
+        assignment = []
+        for idx in sorted(range(len(payload)), key=lambda k: -len(payload[k][0])):
+            target = int(np.argmin(loads))
+            batches[target].append(payload[idx])
+            loads[target] += len(payload[idx][0])
+            assignment.append((idx, target, len(batches[target]) - 1))
+
+        with ProcessPoolExecutor(max_workers=min(n_workers, n_batches)) as pool:
+            batch_results = list(pool.map(_sweep_partitions, batches, [window_ns] * n_batches))
+
+        results = [None] * len(payload)
+        for idx, target, slot in assignment:
+            results[idx] = batch_results[target][slot]
+        return results
+
+    @instrument("correlation.aggregate_rings")
+    def aggregate_rings(self, clusters, min_clusters=3):
+        """
+        Groups clusters into potential 'rings' if multiple clusters share clients.
+        Clients are merged transitively with a disjoint-set, so the result does not
+        depend on cluster order. Ring IDs follow the order of each ring's first cluster.
+        """
+        clients = ClientDisjointSet()
+        roots = []
+
         for cluster in clusters:
-            clients = tuple(sorted(cluster['client_ids']))
-            found_ring = False
-            for ring in rings:
-                # If there's significant overlap in clients, merge or associate
-                if set(clients).intersection(set(ring['client_ids'])):
-                    ring['clusters'].append(cluster)
-                    ring['client_ids'] = list(set(ring['client_ids']).union(set(clients)))
-                    found_ring = True
-                    break
-            
-            if not found_ring:
+            ordinals = [clients.add(c) for c in cluster['client_ids']]
+            for other in ordinals[1:]:
+                clients.union(ordinals[0], other)
+            roots.append(ordinals[0] if ordinals else None)
+
+        ring_index = {}
+        rings = []
+
+        for cluster, root in zip(clusters, roots):
+            key = clients.find(root) if root is not None else ('cluster', cluster['id'])
+            if key not in ring_index:
+                ring_index[key] = len(rings)
                 rings.append({
                     "id": f"RING-{len(rings)}",
-                    "client_ids": list(clients),
-                    "clusters": [cluster]
+                    "client_ids": set(),
+                    "clusters": []
                 })
-        
+            ring = rings[ring_index[key]]
+            ring['clusters'].append(cluster)
+            ring['client_ids'].update(cluster['client_ids'])
+
         # Filter rings that have multiple clusters (repeated behavior)
-        active_rings = [r for r in rings if len(r['clusters']) >= 3]
+        active_rings = [r for r in rings if len(r['clusters']) >= min_clusters]
+        for ring in active_rings:
+            ring['client_ids'] = sorted(ring['client_ids'])
         return active_rings
 
+
+class ClientDisjointSet:
+    """
+    Integer-indexed union-find over client IDs (path compression + union by rank).
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.parent = []
+        self.rank = []
+
+    def add(self, client_id):
+        """Returns the ordinal for a client, registering it on first sight."""
+        ordinal = self.index.get(client_id)
+        if ordinal is None:
+            ordinal = len(self.parent)
+            self.index[client_id] = ordinal
+            self.parent.append(ordinal)
+            self.rank.append(0)
+        return ordinal
+
+    def find(self, ordinal):
+        parent = self.parent
+        root = ordinal
+        while parent[root] != root:
+            root = parent[root]
+        while parent[ordinal] != root:
+            parent[ordinal], ordinal = root, parent[ordinal]
+        return root
+
+    def union(self, a, b):
+        """Merges the sets holding a and b and returns the surviving root."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
+        return root_a
+
 if __name__ == "__main__":
     # Test with generated data
-    trades = pd.read_csv("data/trades.csv")
+    from src.data.storage import PRISMDataStore
+    trades = PRISMDataStore("data").read_table("trades", columns=PRISMDataStore.DETECTION_COLUMNS)
     engine = PRISMCorrelationEngine(time_window_seconds=1.0)
     clusters = engine.detect_mirror_trades(trades)
     rings = engine.aggregate_rings(clusters)
@@ -0,0 +1,190 @@
+import numpy as np
+from src.engine.metrics import instrument
+
+
+class PRISMEcosystemGraph:
+    """
+    One weighted graph over the whole affiliate ecosystem for community-based ring discovery.
+
+    Nodes are integer IDs: clients first, then subs, then partners. Edges are the
+    client -> sub -> partner hierarchy plus client <-> client co-trading edges, stored
+    symmetrically as a CSR adjacency (int64 indptr, int32 indices, float32 weights),
+    so memory is about 16 bytes per edge. Communities come from weighted label
+    propagation, vectorized over all edges per sweep.
+    """
+
+    def __init__(self, hierarchy_weight=0.1, coordination_weight=1.0, max_iterations=30, tolerance=1e-4, seed=42):
+        self.hierarchy_weight = hierarchy_weight
+        self.coordination_weight = coordination_weight
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.seed = seed
+
+        self.client_ids = np.empty(0, dtype=object)
+        self.sub_ids = np.empty(0, dtype=object)
+        self.partner_ids = np.empty(0, dtype=object)
+        self.client_sub = np.empty(0, dtype=np.int32)
+        self.client_partner = np.empty(0, dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.empty(0, dtype=np.int32)
+        self.weights = np.empty(0, dtype=np.float32)
+        self.coordination_edges = 0
+        self.labels = None
+
+    @property
+    def n_nodes(self):
+        return len(self.indptr) - 1
+
+    @property
+    def n_edges(self):
+        """Undirected edge count (each edge is stored in both directions)."""
+        return len(self.indices) // 2
+
+    @instrument("ecosystem.build")
+    def build(self, client_ids, client_sub, client_partner, sub_ids, partner_ids, pair_a, pair_b, pair_scores):
+        """
+        client_sub / client_partner: integer codes into sub_ids / partner_ids per client.
+        pair_a / pair_b / pair_scores: co-trading edges between client ordinals.
+        """
+        self.client_ids = np.asarray(client_ids, dtype=object)
+        self.sub_ids = np.asarray(sub_ids, dtype=object)
+        self.partner_ids = np.asarray(partner_ids, dtype=object)
+        self.client_sub = np.asarray(client_sub, dtype=np.int32)
+        self.client_partner = np.asarray(client_partner, dtype=np.int32)
+        n_clients, n_subs = len(self.client_ids), len(self.sub_ids)
+        n_nodes = n_clients + n_subs + len(self.partner_ids)
+
+        # Hierarchy edges: client -> sub, and each distinct sub -> partner link (unknown parents are skipped)
+        clients = np.flatnonzero(self.client_sub >= 0)
+        links = np.column_stack((self.client_sub, self.client_partner)).astype(np.int64)
+        links = np.unique(links[(links >= 0).all(axis=1)], axis=0)
+        sources = [clients, n_clients + links[:, 0]]
+        targets = [n_clients + self.client_sub[clients].astype(np.int64), n_clients + n_subs + links[:, 1]]
+        weights = [np.full(len(clients) + len(links), self.hierarchy_weight, dtype=np.float32)]
+
+        # Co-trading edges between clients
+        pair_a = np.asarray(pair_a, dtype=np.int64)
+        pair_b = np.asarray(pair_b, dtype=np.int64)
+        keep = (pair_a >= 0) & (pair_b >= 0) & (pair_a != pair_b)
+        sources.append(pair_a[keep])
+        targets.append(pair_b[keep])
+        weights.append((np.asarray(pair_scores, dtype=np.float32)[keep] * self.coordination_weight).astype(np.float32))
+        self.coordination_edges = int(keep.sum())
+
+        src = np.concatenate(sources)
+        dst = np.concatenate(targets)
+        w = np.concatenate(weights)
+
+        # Symmetric CSR: both directions, sorted by source row
+        rows = np.concatenate((src, dst))
+        cols = np.concatenate((dst, src))
+        order = np.argsort(rows, kind='stable')
+        self.indices = cols[order].astype(np.int32)
+        self.weights = np.concatenate((w, w))[order]
+        self.indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_nodes), out=self.indptr[1:])
+        self.labels = None
+        return self
+
+    @instrument("ecosystem.detect_communities")
+    def detect_communities(self):
+        """
+        Weighted label propagation. Each sweep every node in a random half adopts the
+        label with the largest total edge weight among its neighbours (ties to the lowest
+        label; the current label wins ties so nodes do not flip-flop). The random half
+        keeps synchronous updates from oscillating on the bipartite hierarchy.
+        Returns one community label per node.
+        """
+        n = self.n_nodes
+        labels = np.arange(n, dtype=np.int64)
+        if len(self.indices) == 0:
+            self.labels = labels
+            return labels
+
+        rng = np.random.default_rng(self.seed)
+        rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.indptr))
+        # A self vote slightly below any real edge keeps the current label on ties
+        self_vote = np.float32(min(self.hierarchy_weight, float(self.weights.min())) * 1e-3)
+        vote_rows = np.concatenate((rows, np.arange(n, dtype=np.int64)))
+        vote_weights = np.concatenate((self.weights, np.full(n, self_vote, dtype=np.float32))).astype(np.float64)
+
+        for _ in range(self.max_iterations):
+            # Total vote weight per (row, label), summed over the sorted keys
+            keys = vote_rows * n + np.concatenate((labels[self.indices], labels))
+            order = np.argsort(keys)
+            keys = keys[order]
+            key_starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            totals = np.add.reduceat(vote_weights[order], key_starts)
+            keys = keys[key_starts]
+            key_rows = keys // n
+
+            # Best label per row: keys are sorted by (row, label), so the first maximum is the lowest label
+            starts = np.flatnonzero(np.r_[True, key_rows[1:] != key_rows[:-1]])
+            group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(keys)]))
+            is_best = totals == np.maximum.reduceat(totals, starts)[group]
+            best = np.flatnonzero(is_best)
+            best = best[np.r_[True, group[best][1:] != group[best][:-1]]]
+
+            proposed = labels.copy()
+            proposed[key_rows[best]] = keys[best] % n
+            # The current label wins ties
+            keep = is_best & (keys % n == labels[key_rows])
+            proposed[key_rows[keep]] = labels[key_rows[keep]]
+
+            # Stop once (almost) every node already holds its best label
+            if np.count_nonzero(proposed != labels) <= self.tolerance * n:
+                break
+            update = rng.random(n) < 0.5
+            labels[update] = proposed[update]
+
+        self.labels = labels
+        return labels
+
+    def find_rings(self, min_clients=3, cross_partner_only=True):
+        """
+        Turns communities into candidate rings: the clients in each community that
+        co-trade with another member. Rings are ordered by total coordination weight.
+        """
+        if self.labels is None:
+            self.detect_communities()
+        n_clients = len(self.client_ids)
+        end = self.indptr[n_clients]
+        src = np.repeat(np.arange(n_clients, dtype=np.int64), np.diff(self.indptr[:n_clients + 1]))
+        dst = self.indices[:end].astype(np.int64)
+        same = (dst < n_clients) & (self.labels[src] == self.labels[dst])
+        src, w = src[same], self.weights[:end][same]
+        if len(src) == 0:
+            return []
+
+        # Per-community member counts and partner spread, then dicts only for the survivors
+        members = np.unique(src)
+        member_labels = self.labels[members]
+        order = np.argsort(member_labels, kind='stable')
+        members, member_labels = members[order], member_labels[order]
+        community, starts, sizes = np.unique(member_labels, return_index=True, return_counts=True)
+        partner_codes = self.client_partner[members].astype(np.int64)
+        spread = np.unique(np.column_stack((member_labels, partner_codes))[partner_codes >= 0], axis=0)[:, 0]
+        n_partners = np.searchsorted(spread, community, side='right') - np.searchsorted(spread, community, side='left')
+        strength = np.bincount(np.searchsorted(community, self.labels[src]), weights=w, minlength=len(community)) / 2
+
+        selected = sizes >= min_clients
+        if cross_partner_only:
+            selected &= n_partners >= 2
+
+        rings = []
+        for k in np.flatnonzero(selected):
+            ordinals = members[starts[k]:starts[k] + sizes[k]]
+            partner_codes = self.client_partner[ordinals]
+            sub_codes = self.client_sub[ordinals]
+            rings.append({
+                "client_ids": sorted(self.client_ids[ordinals].tolist()),
+                "partner_ids": sorted(set(self.partner_ids[partner_codes[partner_codes >= 0]].tolist())),
+                "sub_ids": sorted(set(self.sub_ids[sub_codes[sub_codes >= 0]].tolist())),
+                "coordination_weight": round(float(strength[k]), 4),
+                "is_cross_partner": bool(n_partners[k] > 1)
+            })
+
+        rings.sort(key=lambda r: (-r['coordination_weight'], r['client_ids']))
+        for k, ring in enumerate(rings):
+            ring['id'] = f"COMMUNITY-{k}"
+        return rings
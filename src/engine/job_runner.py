@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PRISMJob:
+    """
+    One background run. The worker reports through log() and finding(); the UI thread
+    collects those events with drain(), which is safe to call from any session.
+    """
+
+    def __init__(self, job_id, context=None):
+        self.id = job_id
+        self.context = context or {}
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.events = []
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def wait(self, timeout=None):
+        """Blocks until the job finishes; returns False on timeout."""
+        return self._finished.wait(timeout)
+
+    def log(self, message, kind="info"):
+        self._queue.put({"type": "log", "message": message, "kind": kind, "time": time.time()})
+
+    def finding(self, **data):
+        self._queue.put({"type": "finding", **data, "time": time.time()})
+
+    def drain(self):
+        """Moves queued events onto self.events and returns the new ones."""
+        new = []
+        with self._lock:
+            while True:
+                try:
+                    new.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.events.extend(new)
+        return new
+
+
+class PRISMJobRunner:
+    """
+    Runs analysis functions on a thread pool and keeps their jobs by ID, so a page
+    can poll a run it did not start (e.g. after a browser refresh).
+    Threads rather than processes: jobs share the loaded frames without pickling them,
+    and the heavy lifting is in NumPy/pandas, which releases the GIL.
+    """
+
+    def __init__(self, max_workers=1, max_jobs=16):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prism-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, context=None, **kwargs):
+        """
+        Queues fn(job, *args, **kwargs) and returns the job ID. fn reports progress via
+        job.log / job.finding; its return value becomes job.result.
+        context: anything the UI needs to resume the job (kept on the job).
+        """
+        job = PRISMJob(uuid.uuid4().hex[:12], context)
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs beyond max_jobs
+            finished = [jid for jid, j in self._jobs.items() if j.done]
+            for jid in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+                del self._jobs[jid]
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.log(f"Job failed: {job.error}", "warning")
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            job._finished.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+
+_default_runner = None
+_default_lock = threading.Lock()
+
+
+def default_runner():
+    """Process-wide runner shared by every session, so jobs outlive a browser refresh."""
+    global _default_runner
+    with _default_lock:
+        if _default_runner is None:
+            _default_runner = PRISMJobRunner()
+        return _default_runner
@@ -0,0 +1,244 @@
+import bisect
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Latency histogram bucket upper bounds in seconds (Prometheus-style, +Inf implied)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss():
+    """Resident set size in bytes from /proc (else psutil), or None where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return psutil.Process().memory_info().rss if psutil is not None else None
+
+
+def max_rss():
+    """
+    Process high-water RSS in bytes (ru_maxrss is KiB on Linux, bytes on macOS). Without
+    the POSIX resource module, psutil's peak working set (Windows); else None.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    if psutil is not None:
+        return getattr(psutil.Process().memory_info(), "peak_wset", None)
+    return None
+
+
+class PRISMMetrics:
+    """
+    Thread-safe instrumentation registry for engine calls.
+
+    Per stage it keeps call/error counts, trades processed, a latency histogram and the
+    RSS high-water seen when a call finished. A bounded log of recent calls backs the
+    dashboard's throughput and latency figures. to_prometheus() renders everything in
+    the Prometheus text format; serve() exposes it on a local HTTP port.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, recent_calls=2048):
+        self.buckets = tuple(buckets)
+        self._stages = {}
+        self._recent = deque(maxlen=recent_calls)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _stage(self, stage):
+        if stage not in self._stages:
+            self._stages[stage] = {
+                "calls": 0, "errors": 0, "trades": 0, "seconds": 0.0,
+                "buckets": [0] * (len(self.buckets) + 1), "rss_high_water": 0
+            }
+        return self._stages[stage]
+
+    def observe(self, stage, seconds, trades=0, error=False):
+        """Records one finished call of stage."""
+        rss = current_rss() or max_rss()
+        with self._lock:
+            entry = self._stage(stage)
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["trades"] += trades
+            entry["seconds"] += seconds
+            entry["buckets"][bisect.bisect_left(self.buckets, seconds)] += 1
+            entry["rss_high_water"] = max(entry["rss_high_water"], rss or 0)
+            self._recent.append((time.time(), stage, seconds, trades, error))
+
+    def timed(self, stage, trades=0):
+        """Context manager timing one call of stage."""
+        return _Timer(self, stage, trades)
+
+    def summary(self, window_seconds=300):
+        """
+        Dashboard figures over the last window_seconds: engine throughput (trades per
+        second of engine time), p95 latency, success rate and memory high-water.
+        Values are None until something has been recorded (memory: where the platform
+        cannot report it).
+        """
+        cutoff = time.time() - window_seconds
+        with self._lock:
+            recent = [r for r in self._recent if r[0] >= cutoff]
+        trade_calls = [(seconds, trades) for _, _, seconds, trades, _ in recent if trades]
+        busy = sum(seconds for seconds, _ in trade_calls)
+        return {
+            "calls": len(recent),
+            "throughput": sum(t for _, t in trade_calls) / busy if busy > 0 else None,
+            "latency_p95": float(np.percentile([r[2] for r in recent], 95)) if recent else None,
+            "success_rate": 1 - sum(r[4] for r in recent) / len(recent) if recent else None,
+            "memory_high_water": max_rss()
+        }
+
+    def stages(self):
+        """Per-stage totals (copies), by stage name."""
+        with self._lock:
+            return {stage: dict(entry, buckets=list(entry["buckets"])) for stage, entry in self._stages.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._recent.clear()
+
+    def to_prometheus(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        stages = self.stages()
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        def label(stage):
+            return stage.replace("\\", "\\\\").replace('"', '\\"')
+
+        family("prism_stage_calls_total", "counter", "Engine calls per stage.",
+               [f'prism_stage_calls_total{{stage="{label(s)}"}} {e["calls"]}' for s, e in stages.items()])
+        family("prism_stage_errors_total", "counter", "Engine calls per stage that raised.",
+               [f'prism_stage_errors_total{{stage="{label(s)}"}} {e["errors"]}' for s, e in stages.items()])
+        family("prism_trades_processed_total", "counter", "Trade rows processed per stage.",
+               [f'prism_trades_processed_total{{stage="{label(s)}"}} {e["trades"]}' for s, e in stages.items()])
+
+        latency = []
+        for s, e in stages.items():
+            cumulative = np.cumsum(e["buckets"])
+            for bound, count in zip(self.buckets, cumulative):
+                latency.append(f'prism_stage_latency_seconds_bucket{{stage="{label(s)}",le="{bound:g}"}} {count}')
+            latency.append(f'prism_stage_latency_seconds_bucket{{stage="{label(s)}",le="+Inf"}} {e["calls"]}')
+            latency.append(f'prism_stage_latency_seconds_sum{{stage="{label(s)}"}} {e["seconds"]:.6f}')
+            latency.append(f'prism_stage_latency_seconds_count{{stage="{label(s)}"}} {e["calls"]}')
+        family("prism_stage_latency_seconds", "histogram", "Engine call latency per stage.", latency)
+
+        family("prism_stage_rss_high_water_bytes", "gauge", "Highest process RSS seen at the end of a stage call.",
+               [f'prism_stage_rss_high_water_bytes{{stage="{label(s)}"}} {e["rss_high_water"]}' for s, e in stages.items()])
+        peak = max_rss()
+        if peak is not None:
+            family("prism_process_rss_high_water_bytes", "gauge", "Process peak RSS.", [f"prism_process_rss_high_water_bytes {peak}"])
+        rss = current_rss()
+        if rss is not None:
+            family("prism_process_rss_bytes", "gauge", "Process RSS now.", [f"prism_process_rss_bytes {rss}"])
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9108, host="127.0.0.1"):
+        """
+        Serves GET /metrics on a daemon thread; returns the bound (host, port).
+        Idempotent: a second call returns the running server's address.
+        """
+        with self._lock:
+            if self._server is None:
+                registry = self
+
+                class Handler(BaseHTTPRequestHandler):
+                    def do_GET(self):
+                        if self.path.split("?")[0] != "/metrics":
+                            self.send_error(404)
+                            return
+                        body = registry.to_prometheus().encode()
+                        self.send_response(200)
+                        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                        self.send_header("Content-Length", str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+
+                    def log_message(self, *args):
+                        pass  # Keep scrapes out of the app log
+
+                self._server = ThreadingHTTPServer((host, port), Handler)
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, name="prism-metrics", daemon=True).start()
+            return self._server.server_address[:2]
+
+    def shutdown(self):
+        with self._lock:
+            server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+class _Timer:
+    def __init__(self, registry, stage, trades):
+        self.registry = registry
+        self.stage = stage
+        self.trades = trades
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, time.perf_counter() - self.started, self.trades, error=exc_type is not None)
+
+
+_default_metrics = None
+_default_lock = threading.Lock()
+
+
+def default_metrics():
+    """Process-wide registry that the engines report to."""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = PRISMMetrics()
+        return _default_metrics
+
+
+def instrument(stage, trades=None):
+    """
+    Decorator recording each call of an engine method on the default registry.
+    trades: name of the argument whose len() counts as trades processed (e.g. "trades_df").
+    """
+    def decorator(fn):
+        position = list(inspect.signature(fn).parameters).index(trades) if trades else None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            n_trades = 0
+            if trades:
+                frame = kwargs.get(trades, args[position] if len(args) > position else None)
+                n_trades = len(frame) if frame is not None else 0
+            with default_metrics().timed(stage, n_trades):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,79 +1,192 @@
+from collections import OrderedDict
+
 import networkx as nx
+import numpy as np
 import pandas as pd
 
+from src.engine.coordination_engine import PRISMCoordinationEngine
+from src.engine.ecosystem_graph import PRISMEcosystemGraph
+from src.engine.metrics import instrument
+
 class PRISMNetworkMapper:
-    def __init__(self, clients_df, subs_df, partners_df):
+    def __init__(self, clients_df, subs_df, partners_df, layout_seed=42, graph_cache_size=32):
+        """
+        layout_seed: fixed seed so ring layouts are reproducible across reruns.
+        graph_cache_size: number of ring graphs/layouts kept by get_ring_graph (LRU).
+        """
+        self.layout_seed = layout_seed
+        self.graph_cache_size = graph_cache_size
+        self._graph_cache = OrderedDict()
         self.clients_df = clients_df
         self.subs_df = subs_df
         self.partners_df = partners_df
         
-    def build_hierarchy_graph(self, client_ids):
+    @property
+    def clients_df(self):
+        return self._clients_df
+
+    @clients_df.setter
+    def clients_df(self, clients_df):
+        # Re-assigning the same frame (every Streamlit rerun) keeps the built index
+        if clients_df is not getattr(self, '_clients_df', None):
+            self._clients_df = clients_df
+            self._index = None
+            self._graph_cache.clear()
+
+    def _hierarchy_index(self):
+        """
+        Lazily builds the client -> sub -> partner index once per clients table:
+        a hash lookup from client ID to ordinal plus integer arrays for the parents
+        (code -1 where a parent is null).
+        """
+        if self._index is None:
+            clients = self._clients_df.drop_duplicates('client_id')
+            sub_codes, sub_ids = pd.factorize(clients['parent_sub_id'])
+            partner_codes, partner_ids = pd.factorize(clients['master_partner_id'])
+            self._index = {
+                "client_lookup": pd.Index(clients['client_id']),
+                "client_ids": clients['client_id'].to_numpy(),
+                "client_names": clients['name'].to_numpy() if 'name' in clients.columns else clients['client_id'].to_numpy(),
+                "client_sub": sub_codes.astype(np.int32),
+                "client_partner": partner_codes.astype(np.int32),
+                "sub_ids": np.asarray(sub_ids, dtype=object),
+                "partner_ids": np.asarray(partner_ids, dtype=object),
+            }
+        return self._index
+
+    def _client_ordinals(self, client_ids):
+        """Ordinals of the known clients in client_ids, in clients-table order. O(len(client_ids))."""
+        index = self._hierarchy_index()
+        ordinals = index["client_lookup"].get_indexer(pd.unique(np.asarray(list(client_ids), dtype=object)))
+        return np.sort(ordinals[ordinals >= 0])
+
+    def build_hierarchy_graph(self, client_ids, coordination_pairs=None):
         """
         Builds a NetworkX graph showing the relationship between clients, subs, and partners.
+        coordination_pairs: optional top pairs from PRISMCoordinationEngine, drawn as
+        weighted client-to-client edges.
         """
         G = nx.DiGraph()
         
-        relevant_clients = self.clients_df[self.clients_df['client_id'].isin(client_ids)]
+        index = self._hierarchy_index()
+        ordinals = self._client_ordinals(client_ids)
+        rows = zip(
+            index["client_ids"][ordinals],
+            index["client_names"][ordinals],
+            index["client_sub"][ordinals].tolist(),
+            index["client_partner"][ordinals].tolist(),
+        )
         
-        for _, client in relevant_clients.iterrows():
-            c_node = f"C:{client['client_id']}"
-            s_node = f"S:{client['parent_sub_id']}"
-            p_node = f"P:{client['master_partner_id']}"
-            
-            # Add nodes with attributes
-            G.add_node(c_node, type='client', label=client['name'])
-            G.add_node(s_node, type='sub', label=client['parent_sub_id'])
-            G.add_node(p_node, type='partner', label=client['master_partner_id'])
+        for client_id, name, sub_code, partner_code in rows:
+            c_node = f"C:{client_id}"
+            G.add_node(c_node, type='client', label=name)
+            # Unknown parents (null IDs) are skipped, as in the ecosystem graph
+            if sub_code < 0:
+                continue
+            sub_id = index["sub_ids"][sub_code]
+            s_node = f"S:{sub_id}"
+            G.add_node(s_node, type='sub', label=sub_id)
             
             # Add edges (bottom up for detection attribution)
             G.add_edge(c_node, s_node)
-            G.add_edge(s_node, p_node)
+            if partner_code >= 0:
+                partner_id = index["partner_ids"][partner_code]
+                p_node = f"P:{partner_id}"
+                G.add_node(p_node, type='partner', label=partner_id)
+                G.add_edge(s_node, p_node)
+            
+        for pair in coordination_pairs or []:
+            a_node, b_node = f"C:{pair['client_a']}", f"C:{pair['client_b']}"
+            if a_node in G and b_node in G:
+                G.add_edge(a_node, b_node, relation='coordination', weight=pair['score'], co_occurrences=pair['co_occurrences'])
             
         return G
 
-    def build_filtered_graph(self, client_ids, trades_df, filters=None):
+    def build_filtered_graph(self, client_ids, trades_df, filters=None, coordination_pairs=None):
         """
         Builds a graph highlighting clients who participated in specific trades.
         Filters: {'min_volume': 5.0, 'symbol': 'EURUSD', 'direction': 'Buy'}
         """
-        G = self.build_hierarchy_graph(client_ids)
+        G = self.build_hierarchy_graph(client_ids, coordination_pairs)
         
         if not filters:
             return G
             
-        # Filter trades
-        filtered_trades = trades_df[trades_df['client_id'].isin(client_ids)]
-        
-        if 'symbol' in filters and filters['symbol']:
-            filtered_trades = filtered_trades[filtered_trades['symbol'] == filters['symbol']]
-        if 'direction' in filters and filters['direction']:
-             filtered_trades = filtered_trades[filtered_trades['direction'] == filters['direction']]
-        if 'min_volume' in filters and filters['min_volume']:
-             filtered_trades = filtered_trades[filtered_trades['volume'] >= filters['min_volume']]
-             
-        active_clients = filtered_trades['client_id'].unique().tolist()
-        
-        # Mark nodes as active/inactive based on filter
-        for node in G.nodes():
-            if G.nodes[node]['type'] == 'client':
-                start_node = node.split(":")[1]
-                if start_node in active_clients:
-                    G.nodes[node]['status'] = 'active'
-                else:
-                    G.nodes[node]['status'] = 'inactive'
-            else:
-                 G.nodes[node]['status'] = 'active' # Partners/Subs always visible for context
-                 
+        ring_trades = trades_df[trades_df['client_id'].isin(client_ids)]
+        _apply_status(G, _active_clients(ring_trades, filters))
         return G
 
+    @instrument("mapper.get_ring_graph")
+    def get_ring_graph(self, ring_id, client_ids, trades_df, filters=None, coordination_pairs=None):
+        """
+        Returns (graph, layout) for a ring from a cache keyed by ring ID.
+        The graph and the ring's trades are built once; filter changes only toggle the
+        client nodes' 'status'. The layout is computed once with a fixed seed and, if the
+        graph has to be rebuilt, warm-started from the previous positions.
+        """
+        client_ids = list(client_ids)
+        pairs = list(coordination_pairs or [])
+        entry = self._graph_cache.get(ring_id)
+
+        if entry is None or entry['trades_df'] is not trades_df or entry['client_ids'] != client_ids or entry['pairs'] != pairs:
+            G = self.build_hierarchy_graph(client_ids, pairs)
+            nx.set_node_attributes(G, 'active', 'status')
+            previous = entry['pos'] if entry is not None else {}
+            warm = {node: xy for node, xy in previous.items() if node in G}
+            entry = {
+                "graph": G,
+                "pos": nx.spring_layout(G, pos=warm or None, seed=self.layout_seed) if len(G) else {},
+                "trades_df": trades_df,
+                "client_ids": client_ids,
+                "pairs": pairs,
+                "ring_trades": trades_df.loc[trades_df['client_id'].isin(client_ids), ['client_id', 'symbol', 'direction', 'volume']],
+                "filters": None,
+            }
+            self._graph_cache[ring_id] = entry
+            while len(self._graph_cache) > self.graph_cache_size:
+                self._graph_cache.popitem(last=False)
+        self._graph_cache.move_to_end(ring_id)
+
+        filters = dict(filters or {})
+        if entry['filters'] != filters:
+            active = _active_clients(entry['ring_trades'], filters) if filters else None
+            _apply_status(entry['graph'], active)
+            entry['filters'] = filters
+        return entry['graph'], entry['pos']
+
+    @instrument("mapper.build_ecosystem_graph")
+    def build_ecosystem_graph(self, clusters, trades_df=None, min_co_occurrences=2, **graph_options):
+        """
+        Builds one global graph over every client, sub and partner, with co-trading
+        edges scored by PRISMCoordinationEngine from the correlation clusters.
+        graph_options are passed to PRISMEcosystemGraph (weights, iterations, seed).
+        Call find_rings() on the result for community-detected rings.
+        """
+        index = self._hierarchy_index()
+        coordination = PRISMCoordinationEngine(min_co_occurrences).build(clusters, trades_df)
+        ordinals = index["client_lookup"].get_indexer(coordination.client_ids)
+        return PRISMEcosystemGraph(**graph_options).build(
+            index["client_ids"],
+            index["client_sub"],
+            index["client_partner"],
+            index["sub_ids"],
+            index["partner_ids"],
+            ordinals[coordination.pair_a] if len(ordinals) else coordination.pair_a,
+            ordinals[coordination.pair_b] if len(ordinals) else coordination.pair_b,
+            coordination.scores
+        )
+
+    @instrument("mapper.get_attribution")
     def get_attribution(self, client_ids):
         """
         Identifies common partners or sub-affiliates for a group of clients.
+        Costs O(ring size) against the prebuilt hierarchy index.
         """
-        relevant_clients = self.clients_df[self.clients_df['client_id'].isin(client_ids)]
+        index = self._hierarchy_index()
+        ordinals = self._client_ordinals(client_ids)
         
-        partner_counts = relevant_clients['master_partner_id'].value_counts().to_dict()
-        sub_counts = relevant_clients['parent_sub_id'].value_counts().to_dict()
+        partner_counts = _ranked_counts(index["client_partner"][ordinals], index["partner_ids"])
+        sub_counts = _ranked_counts(index["client_sub"][ordinals], index["sub_ids"])
         
         return {
             "top_partners": partner_counts,
@@ -81,3 +194,41 @@ class PRISMNetworkMapper:
             "is_cross_partner": len(partner_counts) > 1,
             "is_cross_sub": len(sub_counts) > 1
         }
+
+
+def _ranked_counts(codes, labels):
+    """
+    {label: count} ordered by count, ties by first appearance (value_counts order).
+    Unknown labels (code -1) are not counted.
+    """
+    codes = codes[codes >= 0]
+    if len(codes) == 0:
+        return {}
+    counts = np.bincount(codes)
+    seen = pd.unique(codes)
+    ranked = seen[np.argsort(-counts[seen], kind='stable')]
+    return {labels[code]: int(counts[code]) for code in ranked}
+
+
+def _active_clients(trades, filters):
+    """Client IDs with at least one trade matching the symbol/direction/min_volume filters."""
+    mask = np.ones(len(trades), dtype=bool)
+    if filters.get('symbol'):
+        mask &= (trades['symbol'] == filters['symbol']).to_numpy()
+    if filters.get('direction'):
+        mask &= (trades['direction'] == filters['direction']).to_numpy()
+    if filters.get('min_volume'):
+        mask &= (trades['volume'] >= filters['min_volume']).to_numpy()
+    return set(trades['client_id'].to_numpy()[mask].tolist())
+
+
+def _apply_status(G, active_clients):
+    """
+    Marks client nodes active/inactive in place (None marks everything active).
+    Partners/Subs always stay visible for context.
+    """
+    for node, data in G.nodes(data=True):
+        if data['type'] == 'client' and active_clients is not None:
+            data['status'] = 'active' if node.split(":", 1)[1] in active_clients else 'inactive'
+        else:
+            data['status'] = 'active'
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+from src.engine.behavior_engine import PRISMBehaviorEngine
+from src.engine.coordination_engine import PRISMCoordinationEngine
+from src.engine.correlation_engine import PRISMCorrelationEngine
+from src.engine.regime_monitor import PRISMRegimeMonitor
+from src.engine.metrics import instrument
+
+
+class PRISMAnalysisPipeline:
+    """
+    Runs every detector over one shared, preprocessed trade frame.
+
+    The frame is built once per dataset: timestamps parsed to datetime64[ns] plus an
+    int64 `entry_ns` column, float32 `duration_seconds`, `parent_sub_id` and
+    `master_partner_id` from a single lookup into clients_df, int32 `client_ordinal`
+    codes and categorical symbol/direction. Engines detect these columns and skip
+    their own parsing and joins. The caller's frames are never modified, and engines
+    only read the shared frame (under copy-on-write any write would copy).
+    Each result is computed on first access and kept on the pipeline.
+    """
+
+    def __init__(self, trades_df, clients_df, subs_df=None, correlation_engine=None, behavior_engine=None,
+                 regime_monitor=None, min_clusters=3):
+        self.trades_df = trades_df
+        self.clients_df = clients_df
+        self.subs_df = subs_df
+        self.correlation_engine = correlation_engine or PRISMCorrelationEngine()
+        self.behavior_engine = behavior_engine or PRISMBehaviorEngine()
+        self.regime_monitor = regime_monitor or PRISMRegimeMonitor()
+        self.min_clusters = min_clusters
+        self._frame = None
+        self._results = {}
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            self._frame = self.prepare(self.trades_df, self.clients_df)
+        return self._frame
+
+    @staticmethod
+    @instrument("pipeline.prepare", trades="trades_df")
+    def prepare(trades_df, clients_df):
+        """Builds the enriched frame: one datetime parse and one client join."""
+        frame = trades_df.copy()
+        for col in ("entry_time", "exit_time"):
+            if col in frame.columns:
+                frame[col] = pd.to_datetime(frame[col]).astype("datetime64[ns]")
+        frame['entry_ns'] = frame['entry_time'].to_numpy().view(np.int64)
+        if 'exit_time' in frame.columns:
+            frame['duration_seconds'] = (frame['exit_time'] - frame['entry_time']).dt.total_seconds().astype(np.float32)
+
+        # Single join: position of each trade's client in the clients table
+        clients = clients_df.drop_duplicates('client_id')
+        position = pd.Index(clients['client_id']).get_indexer(frame['client_id'])
+        for col in ("parent_sub_id", "master_partner_id"):
+            if col in clients.columns:
+                # Unknown clients (position -1) pick the trailing None
+                frame[col] = np.append(clients[col].to_numpy(dtype=object), None)[position]
+        frame['client_ordinal'] = pd.factorize(frame['client_id'])[0].astype(np.int32)
+
+        for col in ("symbol", "direction"):
+            if col in frame.columns and not isinstance(frame[col].dtype, pd.CategoricalDtype):
+                frame[col] = frame[col].astype("category")
+        return frame
+
+    def _memo(self, name, compute):
+        if name not in self._results:
+            self._results[name] = compute()
+        return self._results[name]
+
+    def mirror_trades(self):
+        return self._memo("clusters", lambda: self.correlation_engine.detect_mirror_trades(self.frame))
+
+    def rings(self):
+        return self._memo("rings", lambda: self.correlation_engine.aggregate_rings(self.mirror_trades(), self.min_clusters))
+
+    def coordination(self):
+        return self._memo("coordination", lambda: PRISMCoordinationEngine().build(self.mirror_trades(), self.frame))
+
+    def bonus_abuse(self):
+        return self._memo("bonus_abuse", lambda: self.behavior_engine.detect_bonus_abuse(self.frame, self.clients_df))
+
+    def commission_inflation(self):
+        return self._memo("commission_inflation",
+                          lambda: self.behavior_engine.detect_commission_inflation(self.frame, self.clients_df, self.subs_df))
+
+    def regime_scores(self):
+        return self._memo("regime_scores", lambda: self.regime_monitor.compute_regime_scores(self.frame, self.clients_df))
+
+    def regime_alerts(self):
+        return self._memo("regime_alerts", lambda: self.regime_monitor.build_alerts(self.regime_scores()))
+
+    def communities(self, mapper):
+        """Ecosystem label-propagation rings: {"n_nodes", "n_edges", "rings"}."""
+        def compute():
+            ecosystem = mapper.build_ecosystem_graph(self.mirror_trades(), self.frame)
+            return {"n_nodes": ecosystem.n_nodes, "n_edges": ecosystem.n_edges, "rings": ecosystem.find_rings()}
+        return self._memo("communities", compute)
+
+    def snapshot(self, mapper, synthesizer, progress=None):
+        """
+        Everything the analyst views render, as plain picklable data: detector results,
+        per ring its attribution, top co-trading pairs and evidence package (with the agent
+        decision), an evidence package per behavioral finding, and the ecosystem communities.
+        progress: optional reporter with log(message, kind) and finding(**data), e.g. a PRISMJob.
+        """
+        log = progress.log if progress else lambda message, kind="info": None
+
+        log("Scanning trade logs for temporal synchronization...", "scan")
+        rings = self.rings()
+        log(f"Detected {len(rings)} potential fraud clusters.", "success")
+
+        ring_attribution, ring_pairs, ring_evidence = {}, {}, {}
+        for ring in rings:
+            log(f"Analyzing Ring {ring['id']} attribution and behavior...", "scan")
+            ring_attribution[ring['id']] = mapper.get_attribution(ring['client_ids'])
+            # Every cluster linking two ring members belongs to the ring, so the dataset-wide
+            # matrix restricted to the ring gives the same pairs as a per-ring build
+            ring_pairs[ring['id']] = self.coordination().top_pairs(10, ring['client_ids'])
+            evidence = synthesizer.synthesize_ring(ring, ring_attribution[ring['id']], ring_pairs[ring['id']])
+            ring_evidence[ring['id']] = evidence
+            for line in evidence['agent_decision']['reasoning_logs']:
+                log(f"  > {line}", "info")
+            action = evidence['agent_decision']['selected_action']
+            log(f"Policy authorized. Executing {action} autonomously...", "success")
+            if progress:
+                progress.finding(ring_id=ring['id'], action=action, ring=ring)
+
+        log("Mapping ecosystem communities...", "scan")
+        communities = self.communities(mapper)
+        log("Phase 2 Analysis: Behavioral anomalies...", "scan")
+        bonus_evidence = [
+            synthesizer.synthesize_bonus_abuse(a['client_id'], a['risk_score'], a['trade_count'])
+            for a in self.bonus_abuse()
+        ]
+        commission_evidence = [
+            synthesizer.synthesize_commission_inflation(f['sub_affiliate_id'], f['risk_score'], f['stats'])
+            for f in self.commission_inflation()
+        ]
+        log(f"Flagged {len(bonus_evidence)} bonus abuse and {len(commission_evidence)} commission inflation cases.", "success")
+        log(f"Regime monitor raised {len(self.regime_alerts())} alerts.", "success")
+        return {
+            "created_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "trade_count": len(self.trades_df),
+            "clusters": self.mirror_trades(),
+            "rings": rings,
+            "ring_attribution": ring_attribution,
+            "ring_pairs": ring_pairs,
+            "ring_evidence": ring_evidence,
+            "communities": communities,
+            "bonus_abuse": self.bonus_abuse(),
+            "bonus_evidence": bonus_evidence,
+            "commission_inflation": self.commission_inflation(),
+            "commission_evidence": commission_evidence,
+            "regime_scores": self.regime_scores(),
+            "regime_alerts": self.regime_alerts()
+        }
+
+    def run(self):
+        """Runs every detector and returns the results by name."""
+        return {
+            "clusters": self.mirror_trades(),
+            "rings": self.rings(),
+            "coordination": self.coordination(),
+            "bonus_abuse": self.bonus_abuse(),
+            "commission_inflation": self.commission_inflation(),
+            "regime_scores": self.regime_scores(),
+            "regime_alerts": self.regime_alerts()
+        }
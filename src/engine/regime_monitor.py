@@ -1,65 +1,143 @@
 import pandas as pd
 import numpy as np
+from src.engine.metrics import instrument
 
 class PRISMRegimeMonitor:
-    def __init__(self, baseline_days=20, deviation_threshold=2.5):
+    # (column, alert label, hypothesis wording, direction that counts as suspicious)
+    METRICS = [
+        ("daily_volume", "Volume Surge", "volume spike", 1),
+        ("daily_trades", "Trade Frequency Surge", "trade frequency spike", 1),
+        ("active_clients", "Active Client Surge", "active client spike", 1),
+        ("mean_duration", "Duration Collapse", "collapse in holding time", -1),
+        ("win_rate", "Win Rate Surge", "win rate spike", 1),
+    ]
+
+    def __init__(self, baseline_days=20, deviation_threshold=2.5, current_days=3, min_baseline_days=5):
         self.baseline_days = baseline_days
         self.deviation_threshold = deviation_threshold
+        self.current_days = current_days
+        self.min_baseline_days = min(min_baseline_days, baseline_days)
 
     def detect_regime_shifts(self, trades_df, clients_df):
         """
         Detects partners whose recent behavior deviates significantly from their historical baseline.
-        Metrics: Daily Volume, Trade Count per Client, Win Rate.
+        Metrics: Daily Volume, Trade Count, Active Clients, Mean Duration, Win Rate.
+        Only each partner's most recent day is evaluated; see backfill_regime_shifts for history.
+        """
+        return self.build_alerts(self.compute_regime_scores(trades_df, clients_df), latest_only=True)
+
+    def backfill_regime_shifts(self, trades_df, clients_df):
+        """
+        Returns an alert for every partner-day whose current window breached the threshold.
+        """
+        return self.build_alerts(self.compute_regime_scores(trades_df, clients_df), latest_only=False)
+
+    @instrument("regime.compute_regime_scores", trades="trades_df")
+    def compute_regime_scores(self, trades_df, clients_df):
+        """
+        Scores every partner, every active day and every metric in one pass.
+        The current window is the last `current_days` active days up to and including the
+        row; the baseline is the `baseline_days` active days immediately before it.
+        Per-metric columns are `<metric>_current`, `<metric>_baseline`, `<metric>_std` and
+        `<metric>_z`; `metric`, `z_score`, `current_mean` and `baseline_mean` describe the
+        strongest metric on each row.
+        """
+        # 1. Map trades to Partners (duration / win rate only when the columns exist);
+        #    a PRISMAnalysisPipeline frame is already joined and parsed
+        if 'master_partner_id' in trades_df.columns:
+            trade_partners = trades_df['master_partner_id']
+        else:
+            client_to_partner = clients_df.drop_duplicates('client_id').set_index('client_id')['master_partner_id']
+            trade_partners = trades_df['client_id'].map(client_to_partner)
+        entry_time = trades_df['entry_time']
+        if not pd.api.types.is_datetime64_any_dtype(entry_time):
+            entry_time = pd.to_datetime(entry_time)
+        df = pd.DataFrame({
+            'master_partner_id': trade_partners,
+            'date': entry_time.dt.normalize(),
+            'volume': trades_df['volume'],
+            'trade_id': trades_df['trade_id'],
+            'client_id': trades_df['client_id']
+        })
+        aggregations = {
+            'daily_volume': ('volume', 'sum'),
+            'daily_trades': ('trade_id', 'count'),
+            'active_clients': ('client_id', 'nunique')
+        }
+        if 'duration_seconds' in trades_df.columns or 'exit_time' in trades_df.columns:
+            df['duration'] = self._duration_seconds(trades_df).astype(np.float64)
+            aggregations['mean_duration'] = ('duration', 'mean')
+        if 'profit' in trades_df.columns:
+            df['win'] = (trades_df['profit'] > 0).astype(np.float64)
+            aggregations['win_rate'] = ('win', 'mean')
+
+        # 2. Aggregate Daily Metrics per Partner in a single grouped scan
+        daily_stats = df.groupby(['master_partner_id', 'date']).agg(**aggregations).reset_index()
+        metrics = [m for m in self.METRICS if m[0] in daily_stats.columns]
+        columns = [m[0] for m in metrics]
+        values = daily_stats[columns].astype(np.float64)
+
+        # 3. Rolling current / baseline windows for all partners and metrics at once
+        partners = daily_stats['master_partner_id']
+        current = values.groupby(partners, sort=False).rolling(self.current_days, min_periods=self.current_days).mean()
+        lagged = values.groupby(partners, sort=False).shift(self.current_days)
+        baseline = lagged.groupby(partners, sort=False).rolling(self.baseline_days, min_periods=self.min_baseline_days)
+
+        current = current.reset_index(level=0, drop=True).sort_index().to_numpy()
+        baseline_mean = baseline.mean().reset_index(level=0, drop=True).sort_index().to_numpy()
+        baseline_std = baseline.std().reset_index(level=0, drop=True).sort_index().to_numpy()
+
+        # 4. Signed Z-Scores (undefined for flat baselines)
+        directions = np.array([m[3] for m in metrics], dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = directions * (current - baseline_mean) / np.where(baseline_std > 0, baseline_std, np.nan)
+
+        for k, column in enumerate(columns):
+            daily_stats[f'{column}_current'] = current[:, k]
+            daily_stats[f'{column}_baseline'] = baseline_mean[:, k]
+            daily_stats[f'{column}_std'] = baseline_std[:, k]
+            daily_stats[f'{column}_z'] = z[:, k]
+
+        # Strongest metric per row
+        scored = ~np.isnan(z).all(axis=1)
+        top = np.argmax(np.where(np.isnan(z), -np.inf, z), axis=1)
+        rows = np.arange(len(daily_stats))
+        daily_stats['metric'] = np.where(scored, np.array([m[1] for m in metrics], dtype=object)[top], None)
+        daily_stats['z_score'] = np.where(scored, z[rows, top], np.nan)
+        daily_stats['current_mean'] = np.where(scored, current[rows, top], np.nan)
+        daily_stats['baseline_mean'] = np.where(scored, baseline_mean[rows, top], np.nan)
+        return daily_stats
+
+    @instrument("regime.build_alerts")
+    def build_alerts(self, scores, latest_only=True):
+        """
+        Turns scored partner-days into alert dicts for rows above the deviation threshold,
+        reporting the strongest metric and every metric that breached.
         """
-        # 1. Map trades to Partners
-        df = trades_df.merge(clients_df[['client_id', 'master_partner_id']], on='client_id', how='left')
-        df['date'] = pd.to_datetime(df['entry_time']).dt.date
-        
-        # 2. Aggregate Daily Metrics per Partner
-        daily_stats = df.groupby(['master_partner_id', 'date']).agg(
-            daily_volume=('volume', 'sum'),
-            daily_trades=('trade_id', 'count')
-        ).reset_index()
-        
-        daily_stats = daily_stats.sort_values(['master_partner_id', 'date'])
-        
+        if latest_only:
+            scores = scores.groupby('master_partner_id', sort=False).tail(1)
+        breaches = scores[scores['z_score'] > self.deviation_threshold]
+        metrics = [m for m in self.METRICS if f'{m[0]}_z' in scores.columns]
+
         alerts = []
-        
-        # 3. Analyze each partner
-        for partner in daily_stats['master_partner_id'].unique():
-            p_data = daily_stats[daily_stats['master_partner_id'] == partner]
-            
-            # Not enough data for baseline? Skip.
-            if len(p_data) < 5:
-                continue
-                
-            # Define "Current" as the last 3 days, "Baseline" as everything before
-            current_window = p_data.tail(3)
-            baseline_window = p_data.iloc[:-3]
-            
-            if len(baseline_window) < 5:
-                continue
-            
-            # Calculate Baseline Stats (Mean & Std Dev)
-            baseline_vol_mean = baseline_window['daily_volume'].mean()
-            baseline_vol_std = baseline_window['daily_volume'].std()
-            
-            # Calculate Current Stats
-            current_vol_mean = current_window['daily_volume'].mean()
-            
-            # Check Z-Score for Volume
-            if baseline_vol_std > 0:
-                z_score = (current_vol_mean - baseline_vol_mean) / baseline_vol_std
-                
-                if z_score > self.deviation_threshold:
-                    alerts.append({
-                        "partner_id": partner,
-                        "risk_score": min(0.99, (z_score / 10) + 0.5), # Cap at 0.99
-                        "metric": "Volume Surge",
-                        "baseline": round(baseline_vol_mean, 2),
-                        "current": round(current_vol_mean, 2),
-                        "z_score": round(z_score, 2),
-                        "hypothesis": f"Significant volume spike (Z={z_score:.1f}) detected vs. 20-day baseline. consistent with 'Sleeper' activation."
-                    })
-                    
+        for row in breaches.to_dict('records'):
+            triggered = [m for m in metrics if row[f'{m[0]}_z'] > self.deviation_threshold]
+            key, label, wording, _ = next(m for m in metrics if m[1] == row['metric'])
+            alerts.append({
+                "partner_id": row['master_partner_id'],
+                "risk_score": min(0.99, (row['z_score'] / 10) + 0.5), # Cap at 0.99
+                "metric": label,
+                "metric_key": key,
+                "triggered_metrics": [m[1] for m in triggered],
+                "baseline": round(row['baseline_mean'], 2),
+                "current": round(row['current_mean'], 2),
+                "z_score": round(row['z_score'], 2),
+                "date": row['date'],
+                "hypothesis": f"Significant {wording} (Z={row['z_score']:.1f}) detected vs. {self.baseline_days}-day baseline. consistent with 'Sleeper' activation."
+            })
         return alerts
+
+    def _duration_seconds(self, trades_df):
+        if 'duration_seconds' in trades_df.columns:
+            return trades_df['duration_seconds']
+        return (pd.to_datetime(trades_df['exit_time']) - pd.to_datetime(trades_df['entry_time'])).dt.total_seconds()
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+# id(frame) -> (weakref to the frame, fingerprint); entries leave with their frame
+_frame_fingerprints = {}
+_frame_fingerprints_lock = threading.Lock()
+
+
+def frame_fingerprint(df):
+    """
+    Content fingerprint of a DataFrame: shape, column names and dtypes, and pandas'
+    vectorized per-row hash of every value (index excluded), so any changed cell changes it.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((df.shape, list(df.columns), [str(d) for d in df.dtypes])).encode())
+    if len(df) == 0:
+        return digest.hexdigest()
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def cached_frame_fingerprint(df):
+    """
+    frame_fingerprint() memoized per frame object, so a dataset is hashed once rather than
+    on every rerun. Frames must therefore be replaced, not modified in place, once keyed.
+    """
+    with _frame_fingerprints_lock:
+        entry = _frame_fingerprints.get(id(df))
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+
+    value = frame_fingerprint(df)
+    frame_id = id(df)
+    ref = weakref.ref(df, lambda _: _forget_frame(frame_id, ref))
+    with _frame_fingerprints_lock:
+        _frame_fingerprints[frame_id] = (ref, value)
+    return value
+
+
+def _forget_frame(frame_id, ref):
+    with _frame_fingerprints_lock:
+        # The id may already belong to a newer frame
+        if _frame_fingerprints.get(frame_id, (None,))[0] is ref:
+            del _frame_fingerprints[frame_id]
+
+
+def fingerprint(obj):
+    """Fingerprint for a cache key part: frames by content, containers recursively, the rest by repr."""
+    if isinstance(obj, pd.DataFrame):
+        return cached_frame_fingerprint(obj)
+    if isinstance(obj, (list, tuple)):
+        return "(" + ",".join(fingerprint(o) for o in obj) + ")"
+    if isinstance(obj, dict):
+        return "{" + ",".join(f"{k!r}:{fingerprint(v)}" for k, v in sorted(obj.items(), key=lambda kv: repr(kv[0]))) + "}"
+    if obj is None:
+        return "None"
+    return repr(obj)
+
+
+class PRISMResultCache:
+    """
+    Memoizes engine outputs keyed by the fingerprints of their inputs.
+
+    Results live in an in-memory LRU of max_entries; with cache_dir set they are also
+    pickled to disk, so a restarted process can reuse them. Cached values are returned
+    as-is, so callers must not mutate them; input frames are fingerprinted once per object
+    (see cached_frame_fingerprint). Safe to share with background jobs; compute() runs
+    outside the lock.
+    """
+
+    def __init__(self, max_entries=64, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, namespace, inputs):
+        return f"{namespace}-{hashlib.blake2b(fingerprint(inputs).encode(), digest_size=16).hexdigest()}"
+
+    def get_or_compute(self, namespace, inputs, compute, key=None):
+        """
+        Returns the cached result for (namespace, inputs) or stores compute().
+        inputs: frames and parameters that determine the result, e.g. (trades_df, window).
+        key: self.key(namespace, inputs) when the caller already has it.
+        """
+        key = key or self.key(namespace, inputs)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        path = os.path.join(self.cache_dir, f"{key}.pkl") if self.cache_dir else None
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+            hit = True
+        else:
+            result = compute()
+            hit = False
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self, disk=False):
+        """Drops the in-memory tier (and the on-disk tier when disk=True)."""
+        with self._lock:
+            self._entries.clear()
+        if disk and self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def __len__(self):
+        return len(self._entries)
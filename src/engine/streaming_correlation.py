@@ -0,0 +1,259 @@
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+
+import pandas as pd
+import numpy as np
+
+from src.engine.correlation_engine import ClientDisjointSet
+from src.engine.metrics import instrument
+
+
+class _PartitionBuffer:
+    """
+    Time-ordered trade buffer for one (symbol, direction) pair.
+    Entries are kept as parallel lists sorted by (entry time, arrival sequence).
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.trade_ids = []
+        self.client_ids = []
+        self.visited = []
+        self.head = 0  # First anchor whose window has not closed yet
+        self.closed_until = None  # Window end of the last resolved anchor
+
+    def __len__(self):
+        return len(self.keys)
+
+    def insert(self, key, trade_id, client_id):
+        pos = len(self.keys)
+        if pos and key < self.keys[-1]:
+            pos = bisect_right(self.keys, key)
+        self.keys.insert(pos, key)
+        self.trade_ids.insert(pos, trade_id)
+        self.client_ids.insert(pos, client_id)
+        self.visited.insert(pos, False)
+
+    def evict(self):
+        """Drops resolved entries that can no longer join a future window."""
+        if self.head >= len(self.keys):
+            cut = self.head
+        else:
+            cut = bisect_left(self.keys, (self.keys[self.head][0],), 0, self.head)
+        if cut:
+            del self.keys[:cut]
+            del self.trade_ids[:cut]
+            del self.client_ids[:cut]
+            del self.visited[:cut]
+            self.head -= cut
+
+
+class PRISMStreamingCorrelationEngine:
+    """
+    Incremental counterpart to PRISMCorrelationEngine for live trade feeds.
+
+    Trades arrive in micro-batches; each (symbol, direction) keeps only the trades
+    that can still fall inside an open window. A cluster is emitted as soon as its
+    anchor's window closes against the feed watermark, using the same visited
+    semantics as the batch engine, and rings are updated online.
+
+    Ring state is bounded: each ring counts all of its clusters but keeps only the last
+    max_ring_clusters, and rings with no cluster for ring_retention_seconds of feed time
+    are dropped together with their clients' union-find entries (None disables either).
+    """
+
+    def __init__(self, time_window_seconds=1.0, allowed_lateness_seconds=0.0, min_clusters=3,
+                 max_ring_clusters=100, ring_retention_seconds=7 * 86_400):
+        self.time_window_seconds = time_window_seconds
+        self.allowed_lateness_seconds = allowed_lateness_seconds
+        self.min_clusters = min_clusters
+        self.max_ring_clusters = max_ring_clusters
+        self.ring_retention_seconds = ring_retention_seconds
+
+        self._window_ns = pd.Timedelta(seconds=time_window_seconds).value
+        self._lateness_ns = pd.Timedelta(seconds=allowed_lateness_seconds).value
+        self._partitions = {}
+        self._sequence = 0
+        self.watermark = None
+
+        self._clients = ClientDisjointSet()
+        self._rings = {}  # root ordinal -> ring dict
+        self._ring_count = 0
+        self._retention_ns = None if ring_retention_seconds is None else pd.Timedelta(seconds=ring_retention_seconds).value
+        self._next_expiry = None  # Watermark at which the oldest ring may have gone idle
+
+        self.cluster_count = 0
+        self.trades_processed = 0
+        self.late_trades = 0
+        self.last_batch_latency_ms = 0.0
+
+    @property
+    def buffered_trades(self):
+        return sum(len(buf) for buf in self._partitions.values())
+
+    @instrument("streaming_correlation.process_batch", trades="trades_df")
+    def process_batch(self, trades_df):
+        """
+        Ingests a micro-batch of trades and returns the clusters whose windows closed.
+        Trades older than the allowed lateness behind the watermark are dropped and counted.
+        """
+        started = time.perf_counter()
+
+        if len(trades_df):
+            times = pd.to_datetime(trades_df['entry_time']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+            order = np.argsort(times, kind='stable')
+            rows = zip(
+                times[order].tolist(),
+                trades_df['trade_id'].to_numpy()[order].tolist(),
+                trades_df['client_id'].to_numpy()[order].tolist(),
+                trades_df['symbol'].to_numpy()[order].tolist(),
+                trades_df['direction'].to_numpy()[order].tolist(),
+            )
+            for t, trade_id, client_id, symbol, direction in rows:
+                self._ingest(t, trade_id, client_id, (symbol, direction))
+
+            valid = times[times != np.iinfo(np.int64).min]
+            if len(valid):
+                latest = int(valid.max())
+                self.watermark = latest if self.watermark is None else max(self.watermark, latest)
+
+        clusters = []
+        if self.watermark is not None:
+            clusters = self._close_windows(self.watermark - self._window_ns - self._lateness_ns)
+
+        self.last_batch_latency_ms = (time.perf_counter() - started) * 1000
+        return clusters
+
+    def flush(self):
+        """Closes every open window (end of feed) and returns the remaining clusters."""
+        return self._close_windows(None)
+
+    def get_rings(self, min_clusters=None):
+        """
+        Returns the current rings with at least min_clusters clusters, in ring-ID order.
+        cluster_count is the ring's total; clusters holds the most recent max_ring_clusters.
+        """
+        min_clusters = self.min_clusters if min_clusters is None else min_clusters
+        active = [r for r in self._rings.values() if r['cluster_count'] >= min_clusters]
+        active.sort(key=lambda r: r['order'])
+        return [
+            {"id": r['id'], "client_ids": sorted(r['client_ids']), "cluster_count": r['cluster_count'],
+             "clusters": list(r['clusters'])}
+            for r in active
+        ]
+
+    def _ingest(self, t, trade_id, client_id, partition):
+        if t == np.iinfo(np.int64).min:  # NaT never matches anything
+            return
+        buf = self._partitions.get(partition)
+        if buf is None:
+            buf = self._partitions[partition] = _PartitionBuffer()
+
+        # Too far behind the feed, or inside an already resolved window: cannot be placed consistently
+        if (self.watermark is not None and t < self.watermark - self._lateness_ns) or \
+                (buf.closed_until is not None and t <= buf.closed_until):
+            self.late_trades += 1
+            return
+
+        buf.insert((t, self._sequence), trade_id, client_id)
+        self._sequence += 1
+        self.trades_processed += 1
+
+    def _close_windows(self, cutoff):
+        """Resolves every anchor with entry time <= cutoff (None resolves all)."""
+        events = []
+        for (symbol, _), buf in self._partitions.items():
+            keys = buf.keys
+            while buf.head < len(keys) and (cutoff is None or keys[buf.head][0] <= cutoff):
+                i = buf.head
+                t_i = keys[i][0]
+                buf.head += 1
+                buf.closed_until = t_i + self._window_ns
+                if buf.visited[i]:
+                    continue
+
+                lo = bisect_left(keys, (t_i,))
+                hi = bisect_right(keys, (t_i + self._window_ns, float('inf')))
+                members = [j for j in range(lo, hi) if j != i and not buf.visited[j]]
+                if not any(buf.client_ids[j] != buf.client_ids[i] for j in members):
+                    continue
+
+                buf.visited[i] = True
+                for j in members:
+                    buf.visited[j] = True
+                rows = [i] + members
+                events.append((keys[i], {
+                    "trade_ids": [buf.trade_ids[j] for j in rows],
+                    "client_ids": list(dict.fromkeys(buf.client_ids[j] for j in rows)),
+                    "symbol": symbol,
+                    "entry_time_median": pd.Timestamp(t_i, unit='ns'),
+                    "count": len(rows)
+                }))
+            buf.evict()
+
+        # Windows close against a shared watermark, so anchor order matches the batch engine
+        events.sort(key=lambda e: e[0])
+        clusters = []
+        for key, cluster in events:
+            cluster = {"id": f"CLUSTER-{self.cluster_count}", **cluster}
+            self.cluster_count += 1
+            self._add_to_rings(cluster, key[0])
+            clusters.append(cluster)
+
+        if self._retention_ns is not None and self.watermark is not None and self._next_expiry is not None \
+                and self.watermark >= self._next_expiry:
+            self._expire_rings(self.watermark - self._retention_ns)
+        return clusters
+
+    def _add_to_rings(self, cluster, anchor_ns):
+        ordinals = [self._clients.add(c) for c in cluster['client_ids']]
+        roots = dict.fromkeys(self._clients.find(o) for o in ordinals)
+        merged = [self._rings.pop(r) for r in roots if r in self._rings]
+        root = ordinals[0]
+        for other in ordinals[1:]:
+            root = self._clients.union(root, other)
+
+        if merged:
+            # Ring IDs are stable: the oldest ring absorbs any ring this cluster bridges
+            merged.sort(key=lambda r: r['order'])
+            ring = merged[0]
+            if len(merged) > 1:
+                ring['clusters'] = list(heapq.merge(*(r['clusters'] for r in merged), key=_cluster_number))
+                for other in merged[1:]:
+                    ring['client_ids'].update(other['client_ids'])
+                    ring['cluster_count'] += other['cluster_count']
+        else:
+            ring = {"id": f"RING-{self._ring_count}", "order": self._ring_count, "client_ids": set(),
+                    "clusters": [], "cluster_count": 0, "last_seen": anchor_ns}
+            self._ring_count += 1
+
+        ring['clusters'].append(cluster)
+        if self.max_ring_clusters is not None and len(ring['clusters']) > self.max_ring_clusters:
+            del ring['clusters'][:-self.max_ring_clusters]
+        ring['cluster_count'] += 1
+        ring['client_ids'].update(cluster['client_ids'])
+        ring['last_seen'] = anchor_ns  # Anchors are emitted in time order
+        self._rings[root] = ring
+        if self._retention_ns is not None and self._next_expiry is None:
+            self._next_expiry = anchor_ns + self._retention_ns
+
+    def _expire_rings(self, cutoff):
+        """Drops rings idle since before cutoff and rebuilds the union-find over the survivors."""
+        kept = [r for r in self._rings.values() if r['last_seen'] >= cutoff]
+        self._next_expiry = min(r['last_seen'] for r in kept) + self._retention_ns if kept else None
+        if len(kept) == len(self._rings):
+            return
+
+        self._clients = ClientDisjointSet()
+        self._rings = {}
+        for ring in kept:
+            ordinals = [self._clients.add(c) for c in ring['client_ids']]
+            root = ordinals[0]
+            for other in ordinals[1:]:
+                root = self._clients.union(root, other)
+            self._rings[root] = ring
+
+
+def _cluster_number(cluster):
+    return int(cluster['id'].rsplit('-', 1)[1])
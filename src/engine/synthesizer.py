@@ -5,10 +5,11 @@ class PRISMEvidenceSynthesizer:
     def __init__(self):
         pass
         
-    def synthesize_ring(self, ring, attribution):
+    def synthesize_ring(self, ring, attribution, coordination_pairs=None):
         """
         Generates a summary evidence package for a detected fraud ring,
         now including agentic autonomy recommendations.
+        coordination_pairs: optional top pairs from PRISMCoordinationEngine for this ring.
         """
         num_clients = len(ring['client_ids'])
         num_clusters = len(ring['clusters'])
@@ -37,16 +38,25 @@ class PRISMEvidenceSynthesizer:
         }
         decision = agent.decide_action(context)
         
+        indicators = [
+            "Temporal Synchronization (<1s)",
+            "Cross-Affiliate Coordination",
+            "Repeated Pattern (Mirror Trading)",
+            f"Concentrated Attribution: {top_partner}"
+        ]
+        if coordination_pairs:
+            top_pair = coordination_pairs[0]
+            indicators.append(
+                f"Pairwise Coordination: {top_pair['client_a']} ↔ {top_pair['client_b']} "
+                f"({top_pair['co_occurrences']} shared events, score {top_pair['score']:.2f})"
+            )
+        
         return {
             "hypothesis": hypothesis,
             "exposure": round(exposure, 2),
             "confidence": round(confidence, 2),
-            "indicators": [
-                "Temporal Synchronization (<1s)",
-                "Cross-Affiliate Coordination",
-                "Repeated Pattern (Mirror Trading)",
-                f"Concentrated Attribution: {top_partner}"
-            ],
+            "indicators": indicators,
+            "coordination_pairs": list(coordination_pairs or []),
             "agent_decision": decision,
             "authorized_actions": [a.value for a in agent.get_authorized_actions(confidence)]
         }
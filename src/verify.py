@@ -1,4 +1,4 @@
-import pandas as pd
+from src.data.storage import PRISMDataStore
 from src.engine.correlation_engine import PRISMCorrelationEngine
 from src.engine.network_mapper import PRISMNetworkMapper
 from src.engine.synthesizer import PRISMEvidenceSynthesizer
@@ -7,10 +7,7 @@ def run_verification():
     print("--- PRISM Verification Start ---")
     
     # Load Data
-    p_df = pd.read_csv("data/partners.csv")
-    s_df = pd.read_csv("data/subs.csv")
-    c_df = pd.read_csv("data/clients.csv")
-    t_df = pd.read_csv("data/trades.csv")
+    p_df, s_df, c_df, t_df = PRISMDataStore("data").read_all(trade_columns=PRISMDataStore.DETECTION_COLUMNS)
     
     print(f"Loaded {len(t_df)} trades across {len(c_df)} clients.")
     
@@ -47,3 +47,36 @@ def test_commission_inflation_detection():
     assert len(suspicious) == 1
     assert suspicious[0]['sub_affiliate_id'] == "S1"
     assert suspicious[0]['stats']['total_trades'] == 100
+
+def test_bonus_abuse_scores_scale_with_activity():
+    engine = PRISMBehaviorEngine()
+    clients = pd.DataFrame([{"client_id": "C1"}, {"client_id": "C2"}, {"client_id": "C3"}])
+    trades = pd.DataFrame([
+        {"trade_id": "T1", "client_id": "C1", "volume": 5.0, "entry_time": "2025-01-02 10:00:00", "exit_time": "2025-01-02 10:00:10"},
+        {"trade_id": "T2", "client_id": "C2", "volume": 8.0, "entry_time": "2025-01-02 10:00:00", "exit_time": "2025-01-02 10:00:10"},
+        {"trade_id": "T3", "client_id": "C2", "volume": 8.0, "entry_time": "2025-01-02 11:00:00", "exit_time": "2025-01-02 11:00:20"},
+        # Long hold and low volume trades are not suspicious
+        {"trade_id": "T4", "client_id": "C3", "volume": 5.0, "entry_time": "2025-01-02 10:00:00", "exit_time": "2025-01-02 12:00:00"},
+        {"trade_id": "T5", "client_id": "C3", "volume": 0.1, "entry_time": "2025-01-02 10:00:00", "exit_time": "2025-01-02 10:00:05"},
+    ])
+
+    report = engine.detect_bonus_abuse(trades, clients)
+
+    assert [r['client_id'] for r in report] == ["C1", "C2"]
+    assert report[1]['trade_count'] == 2
+    assert report[1]['suspicious_volume'] == 16.0
+    assert 0.7 < report[0]['risk_score'] < report[1]['risk_score'] < 1.0
+
+def test_precomputed_duration_column_is_used():
+    engine = PRISMBehaviorEngine()
+    trades = pd.DataFrame([
+        {"trade_id": "T1", "client_id": "C1", "volume": 5.0,
+         "entry_time": "2025-01-02 10:00:00", "exit_time": "2025-01-02 10:00:10"}
+    ])
+
+    duration = engine.duration_seconds(trades)
+    assert duration.dtype == "float32" and duration.iloc[0] == 10.0
+
+    # Detectors trust a precomputed column (e.g. the pipeline frame) instead of re-parsing timestamps
+    prepared = trades.assign(duration_seconds=duration * 100)
+    assert engine.detect_bonus_abuse(prepared, None) == []
@@ -0,0 +1,27 @@
+from benchmarks import bench_engines
+from benchmarks.bench_engines import format_tables, measure, parse_size, run_suite, scaling_exponents
+
+def test_suite_smoke():
+    rows = run_suite(["2k"], log=lambda message: None)
+    names = {r['benchmark'] for r in rows}
+    assert {"detect_mirror_trades", "aggregate_rings", "detect_bonus_abuse", "detect_commission_inflation",
+            "detect_regime_shifts", "mapper_attribution", "report_generation"} <= names
+    for row in rows:
+        assert row['seconds'] >= 0 and row['peak_rss_mb'] > 0
+    assert "detect_mirror_trades" in format_tables(rows)
+
+def test_scaling_exponent():
+    assert parse_size("10k") == 10_000 and parse_size("2.5M") == 2_500_000
+    rows = [{"benchmark": "linear", "trades": n, "seconds": n * 1e-6} for n in (1_000, 10_000, 100_000)]
+    rows += [{"benchmark": "quadratic", "trades": n, "seconds": n * n * 1e-9} for n in (1_000, 10_000)]
+    exponents = scaling_exponents(rows)
+    assert abs(exponents["linear"] - 1.0) < 1e-6
+    assert abs(exponents["quadratic"] - 2.0) < 1e-6
+
+def test_measure_without_rss(monkeypatch):
+    monkeypatch.setattr(bench_engines, "current_rss", lambda: None)
+    monkeypatch.setattr(bench_engines, "max_rss", lambda: None)
+    result, stats = measure(lambda: 42)
+    assert result == 42 and stats["peak_rss_mb"] is None and stats["rss_delta_mb"] is None
+    row = {"benchmark": "mirror", "size": "10", "trades": 10, "units": 10, "unit": "trades", "throughput": 10.0, **stats}
+    assert "n/a" in format_tables([row])
@@ -0,0 +1,64 @@
+import json
+import os
+from src.cli import EXIT_CLEAN, EXIT_ERROR, EXIT_FINDINGS, main
+from src.data.data_generator import PRISMDataGenerator
+
+def _dataset(path, fraud=True):
+    generator = PRISMDataGenerator(seed=1)
+    p, s, c = generator.generate_hierarchy(num_partners=3, subs_per_partner=2, clients_per_sub=6, vectorized=True)
+    if fraud:
+        t = generator.generate_trades(c, s, mirror_fraud_groups=2, vectorized=True)
+    else:
+        t = generator.generate_trades(c, mirror_fraud_groups=0, bonus_abuse_count=0, vectorized=True)
+    generator.save_data(p, s, c, t, str(path))
+
+def test_batch_run_writes_reports(tmp_path):
+    _dataset(tmp_path / "data")
+    out = tmp_path / "out"
+    assert main([str(tmp_path / "data"), "-o", str(out), "--workers", "2", "-q"]) == EXIT_FINDINGS
+
+    findings = json.loads((out / "findings.json").read_text())
+    assert findings['counts']['rings'] == len(findings['rings']) > 0
+    for ring in findings['rings']:
+        evidence = json.loads((out / "evidence" / f"{ring['id']}.json").read_text())
+        assert evidence['evidence']['agent_decision']['selected_action'] == ring['action']
+        assert os.path.exists(out / "briefs" / f"PRISM_Evidence_{ring['id']}.html")
+    assert "prism_stage_latency_seconds_bucket" in (out / "metrics.prom").read_text()
+
+def test_exit_codes(tmp_path):
+    _dataset(tmp_path / "clean", fraud=False)
+    assert main([str(tmp_path / "clean"), "-o", str(tmp_path / "out"), "-q"]) == EXIT_CLEAN
+    assert main([str(tmp_path / "missing"), "-o", str(tmp_path / "out"), "-q"]) == EXIT_ERROR
+
+def test_workers_reach_mirror_detection(tmp_path, monkeypatch):
+    from src.engine.correlation_engine import PRISMCorrelationEngine
+    seen = []
+    original = PRISMCorrelationEngine.detect_mirror_trades
+    def detect(self, trades_df):
+        seen.append(self.n_workers)
+        return original(self, trades_df)
+    monkeypatch.setattr(PRISMCorrelationEngine, "detect_mirror_trades", detect)
+
+    _dataset(tmp_path / "data")
+    assert main([str(tmp_path / "data"), "-o", str(tmp_path / "out"), "--workers", "2", "-q"]) == EXIT_FINDINGS
+    assert seen == [2]
+
+def test_db_start_is_inclusive(tmp_path):
+    import sqlite3
+    import pandas as pd
+    from src.cli import load_dataset
+    path = tmp_path / "prism.db"
+    conn = sqlite3.connect(path)
+    pd.DataFrame([{"partner_id": "P-1", "name": "Partner A"}]).to_sql("partners", conn, index=False)
+    pd.DataFrame([{"sub_affiliate_id": "S-1", "parent_partner_id": "P-1"}]).to_sql("subs", conn, index=False)
+    pd.DataFrame([{"client_id": "C-1", "parent_sub_id": "S-1"}]).to_sql("clients", conn, index=False)
+    pd.DataFrame({
+        "trade_id": ["T-0", "T-1", "T-2", "T-3"], "client_id": "C-1",
+        "entry_time": pd.to_datetime(["2025-01-01 23:59:59", "2025-01-02 00:00:00", "2025-01-02 12:00:00", "2025-01-03 00:00:00"]),
+        "symbol": "EURUSD", "direction": "Buy", "volume": 1.0
+    }).to_sql("trades", conn, index=False)
+    conn.close()
+
+    _, _, _, trades = load_dataset(f"sqlite:///{path}", "2025-01-02", "2025-01-03")
+    # A trade stamped exactly at --start (midnight) is kept; --end stays exclusive
+    assert trades['trade_id'].tolist() == ["T-1", "T-2"]
@@ -0,0 +1,47 @@
+import pytest
+import pandas as pd
+from src.engine.coordination_engine import PRISMCoordinationEngine
+from src.engine.network_mapper import PRISMNetworkMapper
+from src.engine.synthesizer import PRISMEvidenceSynthesizer
+
+def _clusters():
+    return [
+        {"id": "CL1", "client_ids": ["C1", "C2", "C3"]},
+        {"id": "CL2", "client_ids": ["C1", "C2"]},
+        {"id": "CL3", "client_ids": ["C2", "C1"]},
+        {"id": "CL4", "client_ids": ["C3", "C4"]},
+    ]
+
+def test_co_occurrence_counts_and_scores():
+    trades = pd.DataFrame({"client_id": ["C1"] * 3 + ["C2"] * 3 + ["C3"] * 12 + ["C4"] * 2})
+
+    engine = PRISMCoordinationEngine(min_co_occurrences=1).build(_clusters(), trades)
+    pairs = engine.top_pairs(k=10)
+
+    assert (pairs[0]['client_a'], pairs[0]['client_b']) == ("C1", "C2")
+    assert pairs[0]['co_occurrences'] == 3
+    assert pairs[0]['score'] == pytest.approx(1.0)  # Every C1/C2 trade was synchronized
+    assert len(pairs) == 4
+
+    # The default threshold drops one-off pairs; ring restriction keeps only member pairs
+    strict = PRISMCoordinationEngine().build(_clusters(), trades)
+    assert len(strict.top_pairs()) == 1
+    assert engine.top_pairs(k=10, client_ids=["C3", "C4"]) == [
+        {"client_a": "C3", "client_b": "C4", "co_occurrences": 1, "score": pytest.approx(1 / (12 * 2) ** 0.5, abs=1e-4)}
+    ]
+
+def test_top_pairs_feed_graph_and_evidence():
+    pairs = PRISMCoordinationEngine().build(_clusters()).top_pairs(k=5)
+    clients = pd.DataFrame([
+        {"client_id": "C1", "parent_sub_id": "S1", "master_partner_id": "P1", "name": "Client 1"},
+        {"client_id": "C2", "parent_sub_id": "S2", "master_partner_id": "P1", "name": "Client 2"},
+    ])
+
+    G = PRISMNetworkMapper(clients, None, None).build_hierarchy_graph(["C1", "C2"], pairs)
+    assert G.edges["C:C1", "C:C2"]['relation'] == 'coordination'
+
+    ring = {"id": "RING-0", "client_ids": ["C1", "C2"], "clusters": [dict(c, count=2) for c in _clusters()[:3]]}
+    attribution = {"top_partners": {"P1": 2}, "top_subs": {"S1": 1, "S2": 1}}
+    evidence = PRISMEvidenceSynthesizer().synthesize_ring(ring, attribution, pairs)
+    assert evidence['coordination_pairs'] == pairs
+    assert any("C1 ↔ C2" in ind for ind in evidence['indicators'])
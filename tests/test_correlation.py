@@ -23,6 +23,30 @@ def test_mirror_trade_detection():
     assert "C2" in clusters[0]['client_ids']
     assert "C3" in clusters[0]['client_ids']
 
+def test_mirror_detection_respects_partitions_and_visited():
+    base_time = datetime(2025, 1, 1, 12, 0, 0)
+    trades = pd.DataFrame([
+        {"trade_id": "T1", "client_id": "C1", "symbol": "EURUSD", "direction": "Buy", "entry_time": base_time},
+        {"trade_id": "T2", "client_id": "C2", "symbol": "EURUSD", "direction": "Buy", "entry_time": base_time + timedelta(milliseconds=600)},
+        # Within 1s of T2 only, and T2 is already claimed by T1's cluster
+        {"trade_id": "T3", "client_id": "C3", "symbol": "EURUSD", "direction": "Buy", "entry_time": base_time + timedelta(milliseconds=1400)},
+        # Same time, different direction / symbol: never matched with the above
+        {"trade_id": "T4", "client_id": "C4", "symbol": "EURUSD", "direction": "Sell", "entry_time": base_time},
+        {"trade_id": "T5", "client_id": "C5", "symbol": "GBPUSD", "direction": "Buy", "entry_time": base_time},
+    ])
+    original = trades.copy()
+
+    engine = PRISMCorrelationEngine(time_window_seconds=1.0)
+    clusters = engine.detect_mirror_trades(trades)
+
+    # T1 claims T2; T3 is left alone because T2 is already visited
+    assert len(clusters) == 1
+    assert clusters[0]['id'] == "CLUSTER-0"
+    assert clusters[0]['trade_ids'] == ["T1", "T2"]
+    assert clusters[0]['entry_time_median'] == pd.Timestamp(base_time)
+    # The caller's frame is left untouched
+    pd.testing.assert_frame_equal(trades, original)
+
 def test_ring_aggregation():
     engine = PRISMCorrelationEngine()
     # Mock clusters
@@ -36,3 +60,42 @@ def test_ring_aggregation():
     assert len(rings) == 1
     assert rings[0]['id'] == "RING-0"
     assert set(rings[0]['client_ids']) == {"C1", "C2"}
+
+def test_ring_aggregation_merges_transitively():
+    engine = PRISMCorrelationEngine()
+    clusters = [
+        {"id": "CL1", "client_ids": ["C1", "C2"]},
+        {"id": "CL2", "client_ids": ["C3", "C4"]},
+        {"id": "CL3", "client_ids": ["C2", "C3"]},  # Bridges both groups
+        {"id": "CL4", "client_ids": ["C9", "C8"]},
+    ]
+
+    rings = engine.aggregate_rings(clusters)
+    assert len(rings) == 1
+    assert rings[0]['client_ids'] == ["C1", "C2", "C3", "C4"]
+    assert [c['id'] for c in rings[0]['clusters']] == ["CL1", "CL2", "CL3"]
+
+    # Same components regardless of input order; the activity filter is configurable
+    reordered = engine.aggregate_rings(list(reversed(clusters)), min_clusters=1)
+    assert sorted(r['client_ids'] for r in reordered) == [["C1", "C2", "C3", "C4"], ["C8", "C9"]]
+    assert reordered[0]['id'] == "RING-0"
+    assert reordered[0]['client_ids'] == ["C8", "C9"]
+
+def test_parallel_detection_matches_serial():
+    base_time = datetime(2025, 1, 1, 12, 0, 0)
+    trades = pd.DataFrame([
+        {
+            "trade_id": f"T{i}",
+            "client_id": f"C{i % 5}",
+            "symbol": ["EURUSD", "GBPUSD", "Gold"][i % 3],
+            "direction": ["Buy", "Sell"][(i // 3) % 2],
+            "entry_time": base_time + timedelta(milliseconds=150 * i),
+        }
+        for i in range(120)
+    ])
+
+    serial = PRISMCorrelationEngine(time_window_seconds=1.0).detect_mirror_trades(trades)
+    parallel = PRISMCorrelationEngine(time_window_seconds=1.0, n_workers=2).detect_mirror_trades(trades)
+
+    assert len(serial) > 0
+    assert parallel == serial
@@ -1,6 +1,7 @@
 import pytest
 import pandas as pd
 import io
+import sqlite3
 from src.data.loader import PRISMDataLoader
 
 def test_get_required_columns():
@@ -37,13 +38,73 @@ def test_load_from_files_invalid_schema():
     with pytest.raises(ValueError, match="Missing required columns: name"):
         loader.load_from_files(p_csv, s_csv, c_csv, t_csv)
 
-def test_load_from_db_mock():
+def _write_db(path, trades):
+    conn = sqlite3.connect(path)
+    pd.DataFrame([{"partner_id": "P-1", "name": "Partner A"}]).to_sql("partners", conn, index=False, if_exists="replace")
+    pd.DataFrame([{"sub_affiliate_id": "S-1", "parent_partner_id": "P-1"}]).to_sql("subs", conn, index=False, if_exists="replace")
+    pd.DataFrame([{"client_id": "C-1", "parent_sub_id": "S-1"}]).to_sql("clients", conn, index=False, if_exists="replace")
+    trades.to_sql("trades", conn, index=False, if_exists="append")
+    conn.close()
+
+def _trades(ids, times):
+    return pd.DataFrame({
+        "trade_id": ids, "client_id": "C-1", "entry_time": pd.to_datetime(times),
+        "symbol": "EURUSD", "direction": "Buy", "volume": 1.0
+    })
+
+def test_load_from_db_incremental(tmp_path):
+    path = tmp_path / "prism.db"
+    _write_db(path, _trades(["T-2", "T-1"], ["2025-01-02", "2025-01-01"]))
+    loader = PRISMDataLoader(chunksize=1)
+    
+    p, s, c, t = loader.load_from_db(f"sqlite:///{path}")
+    assert c.iloc[0]["client_id"] == "C-1"
+    assert t['trade_id'].tolist() == ["T-1", "T-2"]  # ordered by watermark
+    assert isinstance(t['symbol'].dtype, pd.CategoricalDtype)
+    assert loader.last_watermark == pd.Timestamp("2025-01-02")
+    
+    # Nightly run: only trades newer than the watermark are pulled
+    _write_db(path, _trades(["T-3"], ["2025-01-03"]))
+    _, _, _, new = loader.load_from_db(f"sqlite:///{path}", since=loader.last_watermark)
+    assert new['trade_id'].tolist() == ["T-3"]
+    assert loader.last_watermark == pd.Timestamp("2025-01-03")
+
+def test_load_from_db_failure(tmp_path):
     loader = PRISMDataLoader()
     
-    success, msg = loader.load_from_db("postgresql://mock-db")
-    assert success is True
-    assert "Connected" in msg
+    # Empty database: the partners table does not exist
+    with pytest.raises(ValueError, match="Database ingestion failed"):
+        loader.load_from_db(f"sqlite:///{tmp_path / 'empty.db'}")
+
+def test_load_from_files_chunked_typed_trades():
+    loader = PRISMDataLoader(chunksize=1)
+    
+    p_csv = io.BytesIO(b"partner_id,name\nP-1,Partner A")
+    s_csv = io.BytesIO(b"sub_affiliate_id,parent_partner_id\nS-1,P-1")
+    c_csv = io.BytesIO(b"client_id,parent_sub_id\nC-1,S-1")
+    t_csv = io.BytesIO(
+        b"trade_id,client_id,entry_time,pair,direction,volume\n"
+        b"T-1,C-1,2025-01-01 10:00:00,EURUSD,Buy,1.0\n"
+        b"T-2,C-1,2025-01-01 10:00:01,GBPUSD,Sell,2.5"
+    )
+    
+    _, _, _, t = loader.load_from_files(p_csv, s_csv, c_csv, t_csv, column_mapping={"Trades": {"pair": "symbol"}})
+    
+    assert len(t) == 2
+    assert isinstance(t['symbol'].dtype, pd.CategoricalDtype)
+    assert set(t['symbol'].cat.categories) == {"EURUSD", "GBPUSD"}
+    assert isinstance(t['direction'].dtype, pd.CategoricalDtype)
+    assert t['volume'].dtype == "float32"
+    assert pd.api.types.is_datetime64_any_dtype(t['entry_time'])
+
+def test_load_from_files_validates_trade_header_first():
+    loader = PRISMDataLoader()
     
-    success, msg = loader.load_from_db("mysql://real-db")
-    assert success is False
-    assert "failed" in msg
+    p_csv = io.BytesIO(b"partner_id,name\nP-1,Partner A")
+    s_csv = io.BytesIO(b"sub_affiliate_id,parent_partner_id\nS-1,P-1")
+    c_csv = io.BytesIO(b"client_id,parent_sub_id\nC-1,S-1")
+    # Unparseable volume would fail the typed read; the header check must fire first
+    t_csv = io.BytesIO(b"trade_id,client_id,entry_time,symbol,volume\nT-1,C-1,2025-01-01,EURUSD,abc")
+
+    with pytest.raises(ValueError, match="Missing required columns: direction"):
+        loader.load_from_files(p_csv, s_csv, c_csv, t_csv)
@@ -0,0 +1,44 @@
+import pandas as pd
+import numpy as np
+from src.engine.ecosystem_graph import PRISMEcosystemGraph
+from src.engine.network_mapper import PRISMNetworkMapper
+
+def _clients():
+    rows = []
+    for p in range(3):
+        for s in range(2):
+            for c in range(4):
+                rows.append({"client_id": f"C{p}{s}{c}", "parent_sub_id": f"S{p}{s}", "master_partner_id": f"P{p}", "name": f"Client {p}{s}{c}"})
+    return pd.DataFrame(rows)
+
+def test_csr_layout():
+    # 2 clients under one sub/partner plus one co-trading edge
+    g = PRISMEcosystemGraph().build(["C1", "C2"], [0, 0], [0, 0], ["S1"], ["P1"], [0], [1], [0.8])
+    assert g.n_nodes == 4
+    assert g.n_edges == 4  # 2 client->sub, 1 sub->partner, 1 coordination
+    assert g.indptr[-1] == len(g.indices) == len(g.weights)
+    assert g.indices.dtype == np.int32 and g.weights.dtype == np.float32
+    # Client 0 is linked to its sub (node 2) and to client 1
+    assert sorted(g.indices[g.indptr[0]:g.indptr[1]].tolist()) == [1, 2]
+
+def test_cross_partner_ring_found_by_communities():
+    clients = _clients()
+    ring = ["C000", "C101", "C212"]
+    clusters = [{"id": f"CLUSTER-{k}", "client_ids": ring, "trade_ids": []} for k in range(3)]
+
+    graph = PRISMNetworkMapper(clients, None, None).build_ecosystem_graph(clusters)
+    rings = graph.find_rings(min_clients=3)
+
+    assert len(rings) == 1
+    assert rings[0]['id'] == "COMMUNITY-0"
+    assert rings[0]['client_ids'] == ring
+    assert rings[0]['partner_ids'] == ["P0", "P1", "P2"]
+    assert rings[0]['is_cross_partner']
+
+def test_communities_are_deterministic():
+    clients = _clients()
+    clusters = [{"id": "CLUSTER-0", "client_ids": ["C000", "C100"], "trade_ids": []}] * 2
+    mapper = PRISMNetworkMapper(clients, None, None)
+    first = mapper.build_ecosystem_graph(clusters).detect_communities()
+    second = mapper.build_ecosystem_graph(clusters).detect_communities()
+    assert (first == second).all()
@@ -0,0 +1,40 @@
+from src.engine.job_runner import PRISMJobRunner, default_runner
+
+def _analysis(job, n):
+    for i in range(n):
+        job.log(f"step {i}", "scan")
+    job.finding(ring_id="RING-0", action="monitor")
+    return n * 2
+
+def test_job_streams_events_and_result():
+    runner = PRISMJobRunner()
+    job_id = runner.submit(_analysis, 3, context={"key": "abc"})
+    job = runner.get(job_id)
+    assert job.wait(timeout=10)
+
+    assert job.status == "done" and job.result == 6
+    assert job.context == {"key": "abc"}
+    events = job.drain()
+    assert [e['message'] for e in events if e['type'] == "log"] == ["step 0", "step 1", "step 2"]
+    assert events[-1]['ring_id'] == "RING-0"
+    # Drained events stay on the job for later readers
+    assert job.drain() == [] and len(job.events) == 4
+
+def test_failed_job_keeps_error():
+    def broken(job):
+        raise ValueError("bad input")
+
+    runner = PRISMJobRunner()
+    job = runner.get(runner.submit(broken))
+    job.wait(timeout=10)
+    assert job.status == "failed"
+    assert "bad input" in job.error
+
+def test_finished_jobs_are_evicted():
+    runner = PRISMJobRunner(max_jobs=2)
+    ids = [runner.submit(_analysis, 1) for _ in range(2)]
+    for job_id in ids:
+        runner.get(job_id).wait(timeout=10)
+    runner.submit(_analysis, 1)
+    assert runner.get(ids[0]) is None
+    assert default_runner() is default_runner()
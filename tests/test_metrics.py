@@ -0,0 +1,76 @@
+import urllib.request
+import pandas as pd
+import pytest
+from src.engine import metrics as metrics_module
+from src.engine.metrics import PRISMMetrics, default_metrics, instrument
+
+def test_records_calls_latency_and_errors():
+    metrics = PRISMMetrics(buckets=(0.1, 1.0))
+    metrics.observe("mirror", 0.05, trades=1000)
+    metrics.observe("mirror", 0.5, trades=1000)
+    with pytest.raises(ValueError):
+        with metrics.timed("mirror"):
+            raise ValueError("boom")
+
+    stage = metrics.stages()["mirror"]
+    assert stage["calls"] == 3 and stage["errors"] == 1 and stage["trades"] == 2000
+    assert sum(stage["buckets"]) == 3 and stage["buckets"][1] == 1
+    assert stage["rss_high_water"] > 0
+
+    summary = metrics.summary()
+    assert summary["throughput"] == pytest.approx(2000 / 0.55)
+    assert summary["success_rate"] == pytest.approx(2 / 3)
+
+def test_without_rss_sources(monkeypatch):
+    # No /proc, resource module or psutil (e.g. Windows without psutil)
+    monkeypatch.setattr(metrics_module, "resource", None)
+    monkeypatch.setattr(metrics_module, "psutil", None)
+    monkeypatch.setattr(metrics_module, "current_rss", lambda: None)
+    assert metrics_module.max_rss() is None
+
+    metrics = PRISMMetrics()
+    metrics.observe("mirror", 0.05, trades=10)
+    assert metrics.summary()["memory_high_water"] is None
+    text = metrics.to_prometheus()
+    assert "prism_process_rss_high_water_bytes" not in text and "prism_stage_calls_total" in text
+
+def test_instrumented_engine_reports_trades():
+    class Engine:
+        @instrument("test.detect", trades="trades_df")
+        def detect(self, trades_df, threshold=1):
+            return len(trades_df) * threshold
+
+    before = default_metrics().stages().get("test.detect", {"calls": 0, "trades": 0})
+    assert Engine().detect(pd.DataFrame({"x": range(5)})) == 5
+    assert Engine().detect(trades_df=pd.DataFrame({"x": range(3)}), threshold=2) == 6
+    after = default_metrics().stages()["test.detect"]
+    assert after["calls"] - before["calls"] == 2
+    assert after["trades"] - before["trades"] == 8
+
+def test_lookup_stages_do_not_count_trades():
+    from src.engine.coordination_engine import PRISMCoordinationEngine
+    trades = pd.DataFrame({"client_id": ["C1", "C2"] * 50})
+    clusters = [{"client_ids": ["C1", "C2"]}] * 2
+
+    before = default_metrics().stages().get("coordination.build", {"calls": 0, "trades": 0})
+    PRISMCoordinationEngine().build(clusters, trades)
+    after = default_metrics().stages()["coordination.build"]
+    # The frame only supplies per-client frequencies; the trades are counted by the detectors
+    assert after["calls"] - before["calls"] == 1
+    assert after["trades"] == before["trades"]
+
+def test_prometheus_export_and_server():
+    metrics = PRISMMetrics(buckets=(0.1, 1.0))
+    metrics.observe('ring "a"', 0.5, trades=10)
+    text = metrics.to_prometheus()
+    assert '# TYPE prism_stage_latency_seconds histogram' in text
+    assert 'prism_stage_latency_seconds_bucket{stage="ring \\"a\\"",le="0.1"} 0' in text
+    assert 'prism_stage_latency_seconds_bucket{stage="ring \\"a\\"",le="+Inf"} 1' in text
+
+    host, port = metrics.serve(port=0)
+    try:
+        assert metrics.serve(port=0) == (host, port)
+        body = urllib.request.urlopen(f"http://{host}:{port}/metrics").read().decode()
+        assert 'prism_trades_processed_total{stage="ring \\"a\\""} 10' in body
+    finally:
+        metrics.shutdown()
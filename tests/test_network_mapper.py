@@ -30,3 +30,63 @@ def test_graph_filtering():
     G_vol = mapper.build_filtered_graph(["C1", "C2"], trades, filters={'min_volume': 1.5})
     assert G_vol.nodes["C:C1"]['status'] == 'inactive'
     assert G_vol.nodes["C:C2"]['status'] == 'active'
+
+def test_null_parents_are_skipped():
+    clients = pd.DataFrame([
+        {"client_id": "C1", "parent_sub_id": "S1", "master_partner_id": "P1", "name": "Client 1"},
+        {"client_id": "C2", "parent_sub_id": None, "master_partner_id": None, "name": "Client 2"},
+        {"client_id": "C3", "parent_sub_id": "S2", "master_partner_id": "P2", "name": "Client 3"}
+    ])
+    mapper = PRISMNetworkMapper(clients, None, None)
+
+    attribution = mapper.get_attribution(["C1", "C2", "C3"])
+    assert attribution['top_subs'] == {"S1": 1, "S2": 1}
+    assert attribution['top_partners'] == {"P1": 1, "P2": 1}
+
+    G = mapper.build_hierarchy_graph(["C1", "C2", "C3"])
+    assert "C:C2" in G and G.out_degree("C:C2") == 0
+    assert list(G.successors("C:C3")) == ["S:S2"]
+
+def test_attribution_uses_hierarchy_index():
+    clients = pd.DataFrame([
+        {"client_id": "C1", "parent_sub_id": "S2", "master_partner_id": "P1", "name": "Client 1"},
+        {"client_id": "C2", "parent_sub_id": "S1", "master_partner_id": "P1", "name": "Client 2"},
+        {"client_id": "C3", "parent_sub_id": "S1", "master_partner_id": "P2", "name": "Client 3"}
+    ])
+    mapper = PRISMNetworkMapper(clients, None, None)
+
+    attribution = mapper.get_attribution(["C1", "C2", "C3", "C9"])
+    assert attribution['top_subs'] == {"S1": 2, "S2": 1}
+    assert attribution['top_partners'] == {"P1": 2, "P2": 1}
+    assert attribution['is_cross_partner']
+
+    # Re-assigning the same frame keeps the index; a new frame rebuilds it
+    index = mapper._hierarchy_index()
+    mapper.clients_df = clients
+    assert mapper._hierarchy_index() is index
+    mapper.clients_df = clients.assign(master_partner_id="P3")
+    assert mapper.get_attribution(["C1"])['top_partners'] == {"P3": 1}
+
+def test_ring_graph_cache_toggles_status():
+    clients = pd.DataFrame([
+        {"client_id": "C1", "parent_sub_id": "S1", "master_partner_id": "P1", "name": "Client 1"},
+        {"client_id": "C2", "parent_sub_id": "S1", "master_partner_id": "P1", "name": "Client 2"}
+    ])
+    trades = pd.DataFrame([
+        {"trade_id": "T1", "client_id": "C1", "symbol": "EURUSD", "direction": "Buy", "volume": 1.0},
+        {"trade_id": "T2", "client_id": "C2", "symbol": "GBPUSD", "direction": "Sell", "volume": 2.0}
+    ])
+    mapper = PRISMNetworkMapper(clients, None, None)
+
+    G, pos = mapper.get_ring_graph("RING-0", ["C1", "C2"], trades)
+    assert G.nodes["C:C2"]['status'] == 'active'
+
+    # Filter changes reuse the cached graph and layout
+    G_eur, pos_eur = mapper.get_ring_graph("RING-0", ["C1", "C2"], trades, {'symbol': 'EURUSD'})
+    assert G_eur is G and pos_eur is pos
+    assert G.nodes["C:C1"]['status'] == 'active'
+    assert G.nodes["C:C2"]['status'] == 'inactive'
+
+    # Layouts are seeded, so a fresh mapper reproduces them
+    _, pos_fresh = PRISMNetworkMapper(clients, None, None).get_ring_graph("RING-0", ["C1", "C2"], trades)
+    assert all((pos[node] == pos_fresh[node]).all() for node in pos)
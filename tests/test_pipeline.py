@@ -0,0 +1,62 @@
+import pandas as pd
+from src.data.data_generator import PRISMDataGenerator
+from src.engine.behavior_engine import PRISMBehaviorEngine
+from src.engine.coordination_engine import PRISMCoordinationEngine
+from src.engine.correlation_engine import PRISMCorrelationEngine
+from src.engine.pipeline import PRISMAnalysisPipeline
+from src.engine.regime_monitor import PRISMRegimeMonitor
+
+def _data():
+    generator = PRISMDataGenerator(seed=3)
+    p, s, c = generator.generate_hierarchy(num_partners=3, subs_per_partner=2, clients_per_sub=6, vectorized=True)
+    sleeper = [{'partner_id': 'P-1001', 'start_day': 20, 'volume_mult': 5.0}]
+    t = generator.generate_trades(c, s, mirror_fraud_groups=2, regime_shift_config=sleeper, vectorized=True)
+    return s, c, t
+
+def test_prepared_frame_has_shared_columns():
+    s, c, t = _data()
+    original = t.copy()
+    frame = PRISMAnalysisPipeline(t, c, s).frame
+
+    for col in ("entry_ns", "duration_seconds", "parent_sub_id", "master_partner_id", "client_ordinal"):
+        assert col in frame.columns
+    assert frame['entry_time'].dtype == 'datetime64[ns]'
+    assert isinstance(frame['symbol'].dtype, pd.CategoricalDtype)
+    lookup = c.set_index('client_id')['master_partner_id']
+    assert (frame['master_partner_id'] == frame['client_id'].map(lookup)).all()
+    # The caller's frame is untouched
+    pd.testing.assert_frame_equal(t, original)
+
+def test_results_match_separate_engines():
+    s, c, t = _data()
+    correlation, behavior, regime = PRISMCorrelationEngine(), PRISMBehaviorEngine(), PRISMRegimeMonitor()
+    results = PRISMAnalysisPipeline(t, c, s, correlation, behavior, regime).run()
+
+    clusters = correlation.detect_mirror_trades(t)
+    assert results['clusters'] == clusters
+    assert results['rings'] == correlation.aggregate_rings(clusters, 3)
+    assert results['bonus_abuse'] == behavior.detect_bonus_abuse(t, c)
+    assert results['commission_inflation'] == behavior.detect_commission_inflation(t, c, s)
+    assert results['regime_alerts'] == regime.build_alerts(regime.compute_regime_scores(t, c))
+
+def test_snapshot_is_self_contained():
+    import pickle
+    from src.engine.network_mapper import PRISMNetworkMapper
+    from src.engine.synthesizer import PRISMEvidenceSynthesizer
+    generator = PRISMDataGenerator(seed=3)
+    p, s, c = generator.generate_hierarchy(num_partners=3, subs_per_partner=2, clients_per_sub=6, vectorized=True)
+    t = generator.generate_trades(c, s, mirror_fraud_groups=2, vectorized=True)
+    snapshot = PRISMAnalysisPipeline(t, c, s).snapshot(PRISMNetworkMapper(c, s, p), PRISMEvidenceSynthesizer())
+
+    assert snapshot['rings']
+    for ring in snapshot['rings']:
+        evidence = snapshot['ring_evidence'][ring['id']]
+        assert evidence['agent_decision']['selected_action']
+        assert evidence['coordination_pairs'] == snapshot['ring_pairs'][ring['id']]
+        # The shared coordination matrix gives the same pairs as a build over the ring alone
+        per_ring = PRISMCoordinationEngine().build(ring['clusters'], t).top_pairs(10, ring['client_ids'])
+        assert snapshot['ring_pairs'][ring['id']] == per_ring
+    assert len(snapshot['bonus_evidence']) == len(snapshot['bonus_abuse'])
+    assert len(snapshot['commission_evidence']) == len(snapshot['commission_inflation'])
+    # Plain data, so the result cache can persist it
+    assert pickle.loads(pickle.dumps(snapshot))['trade_count'] == len(t)
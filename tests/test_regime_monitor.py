@@ -41,3 +41,56 @@ def test_regime_shift_detection():
     assert len(alerts) == 1
     assert alerts[0]['partner_id'] == "P-TEST"
     assert alerts[0]['z_score'] > 2.0
+
+def test_regime_backfill_uses_baseline_window():
+    base_date = pd.to_datetime("2025-01-01")
+    # Flat 10/day for 10 days, a one-off 50 on day 10, flat again, then a sustained surge
+    volumes = [10, 11] * 5 + [50] + [10, 11] * 5 + [40, 40, 40]
+    trades = pd.DataFrame([
+        {"trade_id": f"T{day}", "client_id": "C1", "volume": float(v), "entry_time": base_date + pd.Timedelta(days=day)}
+        for day, v in enumerate(volumes)
+    ])
+    clients = pd.DataFrame([{"client_id": "C1", "master_partner_id": "P-TEST"}])
+
+    monitor = PRISMRegimeMonitor(baseline_days=5, deviation_threshold=3.0, current_days=1)
+    scores = monitor.compute_regime_scores(trades, clients)
+
+    # Baseline for the last day covers only the 5 active days before the current window
+    last = scores.iloc[-1]
+    assert last['baseline_mean'] == pytest.approx(np.mean(volumes[-6:-1]))
+    assert last['current_mean'] == 40.0
+
+    history = monitor.backfill_regime_shifts(trades, clients)
+    assert [a['date'] for a in history] == [base_date + pd.Timedelta(days=10), base_date + pd.Timedelta(days=21)]
+
+    latest = monitor.detect_regime_shifts(trades, clients)
+    assert len(latest) == 0  # The surge is already part of the 5-day baseline by the last day
+
+def test_regime_monitor_reports_triggering_metric():
+    base_date = pd.to_datetime("2025-01-01")
+    trades = []
+    for day in range(10):
+        # Steady volume throughout; holding time collapses from ~1h to seconds on the last day
+        duration = 5 if day == 9 else 3600 + (60 if day % 2 else -60)
+        for i in range(4):
+            entry = base_date + pd.Timedelta(days=day, hours=i)
+            trades.append({
+                "trade_id": f"T{day}-{i}", "client_id": f"C{i % 2}", "volume": 1.0,
+                "entry_time": entry, "exit_time": entry + pd.Timedelta(seconds=duration),
+                "profit": 10.0 if i % 2 else -10.0
+            })
+    trades_df = pd.DataFrame(trades)
+    clients_df = pd.DataFrame([
+        {"client_id": "C0", "master_partner_id": "P-TEST"},
+        {"client_id": "C1", "master_partner_id": "P-TEST"},
+    ])
+
+    monitor = PRISMRegimeMonitor(baseline_days=5, deviation_threshold=2.0, current_days=1)
+    scores = monitor.compute_regime_scores(trades_df, clients_df)
+    assert {"daily_volume_z", "active_clients_z", "mean_duration_z", "win_rate_z"} <= set(scores.columns)
+
+    alerts = monitor.detect_regime_shifts(trades_df, clients_df)
+    assert len(alerts) == 1
+    assert alerts[0]['metric'] == "Duration Collapse"
+    assert alerts[0]['triggered_metrics'] == ["Duration Collapse"]
+    assert alerts[0]['current'] == 5.0
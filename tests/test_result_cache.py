@@ -0,0 +1,69 @@
+import pandas as pd
+from src.engine import result_cache
+from src.engine.result_cache import PRISMResultCache, frame_fingerprint
+
+def _trades():
+    return pd.DataFrame({
+        "trade_id": ["T1", "T2"],
+        "client_id": ["C1", "C2"],
+        "entry_time": pd.to_datetime(["2025-01-01 10:00:00", "2025-01-01 10:00:01"]),
+        "volume": [1.0, 2.0]
+    })
+
+def test_fingerprint_tracks_content():
+    trades = _trades()
+    assert frame_fingerprint(trades) == frame_fingerprint(trades.copy())
+
+    changed = trades.copy()
+    changed.loc[1, 'volume'] = 3.0
+    assert frame_fingerprint(changed) != frame_fingerprint(trades)
+
+def test_fingerprint_covers_every_row():
+    trades = pd.DataFrame({"client_id": [f"C{i}" for i in range(10_000)], "volume": 1.0})
+    cache = PRISMResultCache()
+    cache.get_or_compute("mirror", (trades,), lambda: "a")
+
+    changed = trades.copy()
+    changed.loc[5000, 'client_id'] = "C-edited"
+    assert cache.get_or_compute("mirror", (changed,), lambda: "b") == "b"
+    assert cache.misses == 2
+
+def test_frames_are_fingerprinted_once(monkeypatch):
+    hashed = []
+    monkeypatch.setattr(result_cache, "frame_fingerprint", lambda df: hashed.append(df) or "fp")
+    trades = _trades()
+    cache = PRISMResultCache()
+    key = cache.key("mirror", (trades, 1.0))
+    assert cache.key("mirror", (trades, 1.0)) == key
+    assert cache.get_or_compute("mirror", (trades, 1.0), lambda: "a", key=key) == "a"
+    assert len(hashed) == 1
+    # A replaced frame is hashed again
+    cache.key("mirror", (trades.copy(), 1.0))
+    assert len(hashed) == 2
+
+def test_memoizes_with_lru_eviction():
+    cache = PRISMResultCache(max_entries=2)
+    calls = []
+    def compute(tag):
+        calls.append(tag)
+        return tag
+
+    trades = _trades()
+    assert cache.get_or_compute("mirror", (trades, 1.0), lambda: compute("a")) == "a"
+    # An equal copy of the frame hits the cache
+    assert cache.get_or_compute("mirror", (trades.copy(), 1.0), lambda: compute("b")) == "a"
+    # Parameters are part of the key
+    cache.get_or_compute("mirror", (trades, 2.0), lambda: compute("c"))
+    cache.get_or_compute("rings", (trades, 1.0), lambda: compute("d"))
+    assert len(cache) == 2
+    cache.get_or_compute("mirror", (trades, 1.0), lambda: compute("e"))  # Evicted, recomputed
+    assert calls == ["a", "c", "d", "e"]
+    assert cache.hits == 1
+
+def test_disk_tier(tmp_path):
+    trades = _trades()
+    PRISMResultCache(cache_dir=str(tmp_path)).get_or_compute("mirror", (trades,), lambda: [1, 2])
+
+    fresh = PRISMResultCache(cache_dir=str(tmp_path))
+    assert fresh.get_or_compute("mirror", (trades,), lambda: None) == [1, 2]
+    assert fresh.hits == 1 and fresh.misses == 0
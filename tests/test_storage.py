@@ -0,0 +1,37 @@
+import pandas as pd
+from src.data.storage import PRISMDataStore
+
+def _tables():
+    partners = pd.DataFrame([{"partner_id": "P1", "name": "Partner 1"}])
+    subs = pd.DataFrame([{"sub_affiliate_id": "S1", "parent_partner_id": "P1"}])
+    clients = pd.DataFrame([{"client_id": "C1", "parent_sub_id": "S1", "master_partner_id": "P1"}])
+    trades = pd.DataFrame({
+        "trade_id": ["T3", "T1", "T2"],
+        "client_id": ["C1", "C1", "C1"],
+        "entry_time": pd.to_datetime(["2025-01-03", "2025-01-01", "2025-01-02"]),
+        "symbol": ["EURUSD", "EURUSD", "GBPUSD"],
+        "direction": ["Buy", "Sell", "Buy"],
+        "volume": [1.0, 2.0, 3.0]
+    })
+    return partners, subs, clients, trades
+
+def test_round_trip(tmp_path):
+    store = PRISMDataStore(str(tmp_path))
+    store.write_all(*_tables())
+    assert store.exists()
+
+    p, s, c, t = store.read_all()
+    assert p.iloc[0]["partner_id"] == "P1"
+    assert c.iloc[0]["master_partner_id"] == "P1"
+    # Trades come back in entry_time order with categorical labels
+    assert t['trade_id'].tolist() == ["T1", "T2", "T3"]
+    assert isinstance(t['symbol'].dtype, pd.CategoricalDtype)
+    assert t['volume'].tolist() == [2.0, 3.0, 1.0]
+
+def test_projection_and_time_filter(tmp_path):
+    store = PRISMDataStore(str(tmp_path), row_group_size=1)
+    store.write_all(*_tables())
+
+    t = store.read_table("trades", PRISMDataStore.DETECTION_COLUMNS, start="2025-01-02", end="2025-01-03")
+    assert list(t.columns) == PRISMDataStore.DETECTION_COLUMNS
+    assert t['trade_id'].tolist() == ["T2"]
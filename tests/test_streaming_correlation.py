@@ -0,0 +1,100 @@
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta
+from src.engine.correlation_engine import PRISMCorrelationEngine
+from src.engine.streaming_correlation import PRISMStreamingCorrelationEngine
+
+def _mirror_feed():
+    base_time = datetime(2025, 1, 1, 12, 0, 0)
+    trades = []
+    for event in range(4):
+        event_time = base_time + timedelta(minutes=event)
+        for k, client in enumerate(["C1", "C2", "C3"]):
+            trades.append({
+                "trade_id": f"T{event}-{client}",
+                "client_id": client,
+                "symbol": "EURUSD",
+                "direction": "Buy",
+                "entry_time": event_time + timedelta(milliseconds=100 * k)
+            })
+        # Unrelated noise between events
+        trades.append({
+            "trade_id": f"N{event}", "client_id": "C9", "symbol": "Gold",
+            "direction": "Sell", "entry_time": event_time + timedelta(seconds=30)
+        })
+    return pd.DataFrame(trades)
+
+def test_streaming_matches_batch_detection():
+    trades = _mirror_feed()
+    engine = PRISMStreamingCorrelationEngine(time_window_seconds=1.0)
+
+    emitted = []
+    for start in range(0, len(trades), 3):
+        emitted += engine.process_batch(trades.iloc[start:start + 3])
+    emitted += engine.flush()
+
+    batch = PRISMCorrelationEngine(time_window_seconds=1.0).detect_mirror_trades(trades)
+    assert [c['trade_ids'] for c in emitted] == [c['trade_ids'] for c in batch]
+    assert [c['id'] for c in emitted] == [c['id'] for c in batch]
+
+    rings = engine.get_rings()
+    assert len(rings) == 1
+    assert rings[0]['client_ids'] == ["C1", "C2", "C3"]
+    assert len(rings[0]['clusters']) == 4
+
+def test_streaming_emits_on_window_close_and_bounds_buffer():
+    trades = _mirror_feed()
+    engine = PRISMStreamingCorrelationEngine(time_window_seconds=1.0)
+
+    # The first event's window is still open until a later trade moves the watermark
+    assert engine.process_batch(trades.iloc[:3]) == []
+    closed = engine.process_batch(trades.iloc[3:4])
+    assert len(closed) == 1
+    assert closed[0]['client_ids'] == ["C1", "C2", "C3"]
+    assert engine.buffered_trades == 1
+
+    # Trades behind a resolved window are counted as late rather than re-opening it
+    engine.process_batch(trades.iloc[1:2])
+    assert engine.late_trades == 1
+
+def test_streaming_drops_trades_behind_the_watermark():
+    trades = _mirror_feed()
+    engine = PRISMStreamingCorrelationEngine(time_window_seconds=1.0, allowed_lateness_seconds=5.0)
+    engine.process_batch(trades.iloc[:4])  # Watermark at the first event + 30s
+
+    # Another partition, so no resolved window covers it: only the watermark rejects it
+    stale = pd.DataFrame([{"trade_id": "L1", "client_id": "C7", "symbol": "GBPUSD", "direction": "Sell",
+                           "entry_time": datetime(2025, 1, 1, 12, 0, 10)}])
+    engine.process_batch(stale)
+    assert engine.late_trades == 1 and engine.buffered_trades == 1
+
+def test_streaming_ring_state_is_bounded():
+    base_time = datetime(2025, 1, 1, 12, 0, 0)
+    # 200 disjoint client pairs, one synchronized pair per minute
+    trades = pd.DataFrame([
+        {"trade_id": f"T{k}-{side}", "client_id": f"C{k}-{side}", "symbol": "EURUSD", "direction": "Buy",
+         "entry_time": base_time + timedelta(minutes=k, milliseconds=100 * side)}
+        for k in range(200) for side in range(2)
+    ])
+    engine = PRISMStreamingCorrelationEngine(time_window_seconds=1.0, ring_retention_seconds=600)
+    for start in range(0, len(trades), 20):
+        engine.process_batch(trades.iloc[start:start + 20])
+
+    assert engine.cluster_count >= 190
+    assert len(engine.get_rings(min_clusters=1)) <= 12
+    assert len(engine._clients.index) <= 24
+
+def test_streaming_ring_keeps_recent_clusters():
+    trades = _mirror_feed()
+    engine = PRISMStreamingCorrelationEngine(time_window_seconds=1.0, max_ring_clusters=2)
+    engine.process_batch(trades)
+    engine.flush()
+
+    ring = engine.get_rings()[0]
+    assert ring['cluster_count'] == 4
+    assert [c['id'] for c in ring['clusters']] == ["CLUSTER-2", "CLUSTER-3"]
+
+    unbounded = PRISMStreamingCorrelationEngine(time_window_seconds=1.0, max_ring_clusters=None)
+    unbounded.process_batch(trades)
+    unbounded.flush()
+    assert len(unbounded.get_rings()[0]['clusters']) == 4
@@ -0,0 +1,71 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.engine.regime_monitor import PRISMRegimeMonitor
+from src.engine.streaming_regime_monitor import PRISMStreamingRegimeMonitor
+
+def _daily_trades(volumes, start_day=0):
+    base_date = pd.to_datetime("2025-01-01 09:00:00")
+    return pd.DataFrame([
+        {"trade_id": f"T{day}-{i}", "client_id": "C1", "volume": v / 2,
+         "entry_time": base_date + pd.Timedelta(days=day, hours=i)}
+        for day, v in enumerate(volumes, start=start_day) for i in range(2)
+    ])
+
+def test_streaming_monitor_fires_intraday_surge():
+    clients = pd.DataFrame([{"client_id": "C1", "master_partner_id": "P-TEST"}])
+    monitor = PRISMStreamingRegimeMonitor(baseline_days=5, deviation_threshold=2.0, clients_df=clients)
+
+    assert monitor.process_trades(_daily_trades([10, 11, 9, 10, 11, 9, 10, 11])) == []
+
+    alerts = monitor.process_trades(_daily_trades([100], start_day=8))
+    assert len(alerts) == 1
+    alert = alerts[0]
+    assert alert['partner_id'] == "P-TEST"
+    assert alert['metric'] == "Volume Surge"
+    assert alert['z_score'] > 2.0
+    assert alert['metric_key'] == "daily_volume"
+    assert alert['triggered_metrics'] == ["Volume Surge"]
+
+def test_streaming_alerts_match_batch_alert_keys():
+    clients = pd.DataFrame([{"client_id": "C1", "master_partner_id": "P-TEST"}])
+    trades = pd.concat([_daily_trades([10, 11, 9, 10, 11, 9, 10, 11]), _daily_trades([100, 100, 100], start_day=8)])
+
+    batch = PRISMRegimeMonitor(baseline_days=5, deviation_threshold=2.0).detect_regime_shifts(trades, clients)
+    streaming = PRISMStreamingRegimeMonitor(baseline_days=5, deviation_threshold=2.0, clients_df=clients).process_trades(trades)
+    assert batch and streaming
+    assert all(set(alert) == set(batch[0]) for alert in streaming)
+
+def test_streaming_monitor_state_round_trip(tmp_path):
+    clients = pd.DataFrame([{"client_id": "C1", "master_partner_id": "P-TEST"}])
+    history = _daily_trades([10, 11, 9, 10, 11, 9, 10, 11])
+    spike = _daily_trades([100], start_day=8)
+
+    live = PRISMStreamingRegimeMonitor(baseline_days=5, deviation_threshold=2.0, clients_df=clients)
+    live.process_trades(history)
+    live.save_state(tmp_path / "regime_state.npz")
+
+    restored = PRISMStreamingRegimeMonitor.load_state(tmp_path / "regime_state.npz")
+    assert restored.mean[0] == pytest.approx(live.mean[0])
+    assert restored.process_trades(spike) == live.process_trades(spike)
+
+def test_state_keeps_int_client_ids(tmp_path):
+    clients = pd.DataFrame([{"client_id": 101, "master_partner_id": "P-TEST"}])
+    history = _daily_trades([10, 11, 9, 10, 11, 9, 10, 11]).assign(client_id=101)
+    spike = _daily_trades([100], start_day=8).assign(client_id=101)
+
+    live = PRISMStreamingRegimeMonitor(baseline_days=5, deviation_threshold=2.0, clients_df=clients)
+    live.process_trades(history)
+    live.save_state(tmp_path / "regime_state.npz")
+
+    restored = PRISMStreamingRegimeMonitor.load_state(tmp_path / "regime_state.npz")
+    assert len(restored.process_trades(spike)) == 1
+
+def test_nan_volume_is_skipped():
+    clients = pd.DataFrame([{"client_id": "C1", "master_partner_id": "P-TEST"}])
+    trades = _daily_trades([10, 11, 9, 10, 11, 9, 10, 11])
+    trades.loc[3, 'volume'] = float("nan")
+    monitor = PRISMStreamingRegimeMonitor(baseline_days=5, deviation_threshold=2.0, clients_df=clients)
+    monitor.process_trades(trades)
+    assert np.isfinite(monitor.mean[0]) and np.isfinite(monitor.var[0])
+    assert len(monitor.process_trades(_daily_trades([100], start_day=8))) == 1